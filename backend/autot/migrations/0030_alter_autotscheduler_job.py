@@ -0,0 +1,31 @@
+# Generated by Django 6.0.5 on 2026-10-18 10:02
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("autot", "0029_torrent_has_tracker_list_torrent_message"),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name="autotscheduler",
+            name="job",
+            field=models.CharField(
+                choices=[
+                    ("tv.tasks.refresh_all_shows", "Refresh All Shows"),
+                    ("tv.tasks.refresh_status", "Refresh Episode Status"),
+                    ("movie.tasks.refresh_all_movies", "Refresh all Movies"),
+                    ("movie.tasks.refresh_status", "Refresh Movie Status"),
+                    ("people.tasks.refresh_people", "Refresh People"),
+                    ("autot.tasks.cleanup", "Cleanup Database"),
+                    ("autot.tasks.clear_cache", "Clear Redis Cache"),
+                    ("autot.tasks.poll_release_feed", "Poll Release Feed"),
+                ],
+                max_length=255,
+                unique=True,
+            ),
+        ),
+    ]
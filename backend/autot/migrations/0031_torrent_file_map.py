@@ -0,0 +1,18 @@
+# Generated by Django 6.0.5 on 2026-10-18 14:21
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("autot", "0030_alter_autotscheduler_job"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="torrent",
+            name="file_map",
+            field=models.JSONField(blank=True, null=True),
+        ),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 6.0.5 on 2026-10-18 15:02
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("autot", "0031_torrent_file_map"),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name="appconfig",
+            name="file_archive_operation",
+            field=models.CharField(
+                choices=[
+                    ("m", "Move"),
+                    ("c", "Copy"),
+                    ("d", "Copy and Delete"),
+                    ("l", "Hard link"),
+                    ("a", "Auto, hard link or copy"),
+                ],
+                default="c",
+                max_length=1,
+            ),
+        ),
+    ]
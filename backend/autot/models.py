@@ -2,7 +2,9 @@
 
 import logging
 import zoneinfo
-from datetime import datetime
+from collections.abc import Callable
+from datetime import datetime, timedelta
+from time import time_ns
 
 from autot.src.helper import get_magnet_hash
 from autot.static import TASK_OPTIONS
@@ -10,11 +12,13 @@ from crontab import CronTab
 from django.conf import settings
 from django.contrib.contenttypes.fields import GenericForeignKey
 from django.contrib.contenttypes.models import ContentType
+from django.core.cache import cache
 from django.core.exceptions import ValidationError
 from django.db import models
 from django.db.models.signals import post_delete, post_save, pre_delete
 from django.dispatch import receiver
 from django.urls import reverse
+from django.utils import timezone
 from django_rq import get_scheduler
 from django_rq.jobs import Job
 
@@ -72,6 +76,72 @@ class SearchWord(models.Model):
         return {i[0] for i in getattr(self, related_field).all().values_list("id")}
 
 
+KEYWORDS_VERSION_KEY = "keywords:version"
+
+
+def get_cached_keywords(instance, resolve: Callable[[], models.QuerySet]) -> models.QuerySet:
+    """get resolved keywords of instance, cached until any keyword relation changes"""
+    version = cache.get_or_set(KEYWORDS_VERSION_KEY, time_ns, timeout=None)
+    key = f"keywords:{instance._meta.model_name}:{instance.pk}:{version}"
+    keyword_ids = cache.get(key)
+    if keyword_ids is None:
+        keyword_ids = list(resolve().values_list("id", flat=True))
+        cache.set(key, keyword_ids, timeout=settings.CACHE_TTL)
+
+    return SearchWord.objects.filter(id__in=keyword_ids).select_related("category")
+
+
+def invalidate_keywords() -> None:
+    """bump keyword version, invalidates all cached keyword resolutions"""
+    cache.set(KEYWORDS_VERSION_KEY, time_ns(), timeout=None)
+
+
+@receiver(post_save, sender=SearchWord)
+@receiver(post_delete, sender=SearchWord)
+@receiver(post_save, sender=SearchWordCategory)
+@receiver(post_delete, sender=SearchWordCategory)
+def invalidate_keywords_signal(sender, instance, **kwargs):  # pylint: disable=unused-argument
+    """keyword or category changed"""
+    invalidate_keywords()
+
+
+class SearchBackoff(models.Model):
+    """abstract, schedule automatic searches with exponential backoff on misses"""
+
+    SEARCH_BACKOFF_BASE = timedelta(hours=1)
+    SEARCH_BACKOFF_MAX = timedelta(days=2)
+
+    search_misses = models.PositiveIntegerField(default=0, verbose_name="Search misses")
+    next_search_at = models.DateTimeField(null=True, blank=True, verbose_name="Next search")
+
+    class Meta:
+        """set abstract to not create db relations"""
+
+        abstract = True
+
+    @classmethod
+    def search_due(cls) -> models.Q:
+        """filter for items due for next search"""
+        return models.Q(next_search_at__isnull=True) | models.Q(next_search_at__lte=timezone.now())
+
+    @classmethod
+    def reset_search_backoff_bulk(cls, queryset: models.QuerySet) -> None:
+        """reset backoff in bulk, skip save signals"""
+        queryset.filter(search_misses__gt=0).update(search_misses=0, next_search_at=None)
+
+    def set_search_missed(self) -> None:
+        """register search miss, push next search out"""
+        self.search_misses += 1
+        exponent = min(self.search_misses - 1, 16)
+        delay = min(self.SEARCH_BACKOFF_BASE * 2**exponent, self.SEARCH_BACKOFF_MAX)
+        self.next_search_at = timezone.now() + delay
+
+    def reset_search_backoff(self) -> None:
+        """search on next run again"""
+        self.search_misses = 0
+        self.next_search_at = None
+
+
 class AppConfig(models.Model):
     """dynamic app config, single row, all fields must have defaults"""
 
@@ -89,6 +159,7 @@ class AppConfig(models.Model):
         ("c", "Copy"),
         ("d", "Copy and Delete"),
         ("l", "Hard link"),
+        ("a", "Auto, hard link or copy"),
     ]
 
     single_lock = models.PositiveSmallIntegerField(default=1, unique=True)
@@ -196,10 +267,50 @@ class Torrent(models.Model):
     has_expected_files = models.BooleanField(null=True, blank=True)
     has_tracker_list = models.BooleanField(default=False)
     message = models.CharField(max_length=255, null=True, blank=True)
+    file_map = models.JSONField(null=True, blank=True)
+
+    DIRTY_FIELDS = ["torrent_state", "progress", "has_expected_files", "has_tracker_list", "message"]
 
     class Meta:
         unique_together = ("magnet", "torrent_type")
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        """remember loaded values for dirty tracking"""
+        instance = super().from_db(db, field_names, values)
+        instance.set_clean()
+        return instance
+
+    def save(self, *args, **kwargs):
+        """save, saved values are clean"""
+        super().save(*args, **kwargs)
+        self.set_clean()
+
+    def refresh_from_db(self, *args, **kwargs):
+        """reload from db, reloaded values are clean"""
+        super().refresh_from_db(*args, **kwargs)
+        self.set_clean()
+
+    def set_clean(self) -> None:
+        """mark current values as persisted"""
+        self._loaded_values = {i: getattr(self, i) for i in self.DIRTY_FIELDS if i in self.__dict__}
+
+    def get_dirty_fields(self) -> dict[str, tuple]:
+        """changed fields since load or save as old, new value pairs"""
+        loaded_values = getattr(self, "_loaded_values", {})
+        return {
+            field: (old_value, getattr(self, field))
+            for field, old_value in loaded_values.items()
+            if getattr(self, field) != old_value
+        }
+
+    def get_file(self, item_id: int) -> str | None:
+        """get validated file name of episode or movie id"""
+        if not self.file_map:
+            return None
+
+        return self.file_map.get(str(item_id))
+
     @property
     def magnet_hash(self):
         """extract magnet hash"""
@@ -466,8 +577,22 @@ def log_change(
     comment: str | None = None,
 ) -> None:
     """Logs a change to the ActionLog model."""
+    log_item = build_change(instance, action, field_name, old_value, new_value, comment)
+    log_item.save()
+    logger.info(log_item)
+
+
+def build_change(
+    instance,
+    action: str,
+    field_name: str | None = None,
+    old_value: str | None = None,
+    new_value: str | None = None,
+    comment: str | None = None,
+) -> ActionLog:
+    """build unsaved ActionLog item, persist many with log_changes"""
     content_type = ContentType.objects.get_for_model(instance.__class__)
-    log_item = ActionLog.objects.create(
+    return ActionLog(
         content_type=content_type,
         object_id=instance.pk,
         action=action,
@@ -476,7 +601,16 @@ def log_change(
         new_value=new_value,
         comment=comment,
     )
-    logger.info(log_item)
+
+
+def log_changes(log_items: list[ActionLog]) -> None:
+    """write ActionLog items in one batch"""
+    if not log_items:
+        return
+
+    ActionLog.objects.bulk_create(log_items)
+    for log_item in log_items:
+        logger.info(log_item)
 
 
 def get_logs(instance):
@@ -1,17 +1,38 @@
 """archive completed torrents"""
 
+import logging
 from collections.abc import Callable
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from contextlib import nullcontext
 from pathlib import Path
+from typing import TypedDict
 
+import numpy as np
 from autot.models import AppConfig, Torrent, log_change
-from autot.src.archive_options import copy, copy_and_delete, hard_link, move
+from autot.src.archive_options import auto, copy, copy_and_delete, hard_link, move
 from autot.src.config import ConfigType, get_config
+from autot.src.device_limiter import DeviceLimiter
 from autot.src.download import Transmission
+from autot.src.matcher import BatchMatcher
 from django.db.models import QuerySet
 from movie.models import Movie
 from transmission_rpc.torrent import Torrent as TransmissionTorrent
 from tv.models import TVEpisode
 
+logger = logging.getLogger("django")
+
+Transfer = tuple[TVEpisode | Movie, Path, Path]
+
+
+class ArchiveJob(TypedDict):
+    """file transfers of one torrent, prepared and finished on the calling thread"""
+
+    torrent: Torrent
+    tm_torrent: TransmissionTorrent
+    transfers: list[Transfer]
+    target_base: Path
+    done: list[TVEpisode | Movie]
+
 
 class Archiver:
     """archive media file"""
@@ -34,53 +55,189 @@ class Archiver:
             "func": hard_link,
             "delete_t": False,
         },
+        "a": {
+            "func": auto,
+            "delete_t": False,
+        },
     }
 
     def archive(self) -> bool:
-        """archive all"""
+        """archive all, transfers to independent disks run in parallel"""
         to_archive = self._get_to_archive()
         if not to_archive:
             return False
 
+        tm = Transmission()
+        tm.load_snapshot([i.magnet_hash for i in to_archive])
+        archive_options = self._get_archive_function()
+        errors: list[OSError] = []
+        jobs = []
         for torrent in to_archive:
-            self.archive_single_torrent(torrent)
+            try:
+                job = self._prepare(torrent, tm, archive_options)
+            except OSError as err:
+                logger.error("failed to archive %s: %s", torrent, str(err))
+                errors.append(err)
+                continue
+
+            if job:
+                jobs.append(job)
+
+        if jobs:
+            errors.extend(self._run_jobs(jobs, archive_options, tm))
+
+        if errors:
+            raise errors[0]
 
         return True
 
+    def _run_jobs(self, jobs: list[ArchiveJob], archive_options: dict, tm: Transmission) -> list[OSError]:
+        """transfer files in threads limited per device, update db on calling thread"""
+        limiter = DeviceLimiter(
+            source=self.CONFIG["TM_BASE_FOLDER"],
+            targets=[self.CONFIG["TV_BASE_FOLDER"], self.CONFIG["MOVIE_BASE_FOLDER"]],
+            slots=self.CONFIG["ARCHIVE_DEVICE_CONCURRENCY"],
+        )
+        errors = []
+        with ThreadPoolExecutor(max_workers=min(len(jobs), limiter.capacity)) as executor:
+            futures = {executor.submit(self._transfer, job, archive_options["func"], limiter): job for job in jobs}
+            for future in as_completed(futures):
+                job = futures[future]
+                try:
+                    future.result()
+                except OSError as err:
+                    logger.error("failed to archive %s: %s", job["torrent"], str(err))
+                    errors.append(err)
+
+                self._finish(job, archive_options, tm)
+
+        return errors
+
     def _get_to_archive(self) -> QuerySet:
         """get finished torrents"""
         return Torrent.objects.filter(torrent_state="f")
 
-    def archive_single_torrent(self, torrent: Torrent) -> None:
-        """run archiver"""
-        tm = Transmission()
+    def archive_single_torrent(self, torrent: Torrent, tm: Transmission | None = None) -> None:
+        """run archiver, pass transmission with loaded snapshot when archiving in bulk"""
+        tm = tm or Transmission()
+        archive_options = self._get_archive_function()
+        job = self._prepare(torrent, tm, archive_options)
+        if not job:
+            return
+
+        try:
+            self._transfer(job, archive_options["func"])
+        finally:
+            self._finish(job, archive_options, tm)
+
+    def _prepare(self, torrent: Torrent, tm: Transmission, archive_options: dict) -> ArchiveJob | None:
+        """resolve source and target of all files in torrent, None if not ready"""
         tm_torrent = tm.get_single(torrent)
         if not tm_torrent:
             torrent.torrent_state = "i"
             torrent.save()
-            return
-
-        if not tm_torrent.is_finished:
-            return
+            return None
 
-        archive_options = self._get_archive_function()
+        if not self.is_done(tm_torrent, archive_options):
+            return None
 
         if torrent.torrent_type in ["e", "s", "w"]:
-            episodes = TVEpisode.objects.filter(torrent=torrent).exclude(status="f")
-            for episode in episodes:
-                self._archive_episode(tm_torrent, episode, archive_options["func"])
+            episodes = list(TVEpisode.objects.filter(torrent=torrent).exclude(status="f"))
+            file_map = self._get_file_map(torrent, tm_torrent, episodes)
+            transfers = [
+                self._get_episode_transfer(tm_torrent, episode, file_map.get(str(episode.id))) for episode in episodes
+            ]
+            target_base = self.CONFIG["TV_BASE_FOLDER"]
         elif torrent.torrent_type == "m":
             movie = Movie.objects.get(torrent=torrent)
-            self._archive_movie(tm_torrent, movie, archive_options["func"])
+            transfers = [self._get_movie_transfer(tm_torrent, movie, torrent.get_file(movie.id))]
+            target_base = self.CONFIG["MOVIE_BASE_FOLDER"]
         else:
             raise NotImplementedError
 
+        return {
+            "torrent": torrent,
+            "tm_torrent": tm_torrent,
+            "transfers": transfers,
+            "target_base": target_base,
+            "done": [],
+        }
+
+    def _transfer(self, job: ArchiveJob, archive_func: Callable, limiter: DeviceLimiter | None = None) -> None:
+        """run file operations of job, no db access, safe to run in thread"""
+        with limiter.acquire(job["target_base"]) if limiter else nullcontext():
+            for to_archive, download_path, archive_path in job["transfers"]:
+                archive_func(src_file=download_path, target_file=archive_path)
+                job["done"].append(to_archive)
+
+    def _finish(self, job: ArchiveJob, archive_options: dict, tm: Transmission) -> None:
+        """set status of transferred items, mark torrent archived if all done"""
+        for to_archive in job["done"]:
+            old_status = to_archive.status
+            to_archive.status = "f"
+            to_archive.save()
+            log_change(to_archive, "u", field_name="status", old_value=old_status, new_value="f")
+
+        if len(job["done"]) < len(job["transfers"]):
+            return
+
         if archive_options["delete_t"]:
-            tm.delete(tm_torrent)
+            tm.delete(job["tm_torrent"])
 
+        torrent = job["torrent"]
         torrent.torrent_state = "a"
         torrent.save()
 
+    def archive_by_hash(self, magnet_hash: str) -> bool:
+        """archive single finished torrent, mark finished if the watcher didn't yet"""
+        to_check = Torrent.objects.filter(torrent_state__in=["q", "d", "f"])
+        torrent = next((i for i in to_check if i.magnet_hash == magnet_hash), None)
+        if not torrent:
+            return False
+
+        tm = Transmission()
+        tm.load_snapshot([magnet_hash])
+        tm_torrent = tm.get_single(torrent)
+        if not tm_torrent or not self.is_done(tm_torrent, self._get_archive_function()):
+            # leave to download watcher
+            return False
+
+        if not torrent.has_expected_files:
+            tm.validate_expected(tm_torrent, torrent)
+            if torrent.torrent_state == "i":
+                return False
+
+        if torrent.torrent_state != "f":
+            log_change(torrent, "u", field_name="torrent_state", old_value=torrent.torrent_state, new_value="f")
+            torrent.torrent_state = "f"
+            torrent.progress = None
+            torrent.save()
+
+        self.archive_single_torrent(torrent, tm)
+
+        return True
+
+    @staticmethod
+    def is_done(tm_torrent: TransmissionTorrent, archive_options: dict) -> bool:
+        """stopped after seeding, or fully downloaded and still seeding if the archive keeps the torrent"""
+        if tm_torrent.is_finished:
+            return True
+
+        return tm_torrent.percent_done >= 1 and not archive_options["delete_t"]
+
+    def _get_file_map(
+        self, torrent: Torrent, tm_torrent: TransmissionTorrent, episodes: list[TVEpisode]
+    ) -> dict[str, str]:
+        """get file map stored on validation, build in one pass if missing"""
+        if torrent.file_map:
+            return torrent.file_map
+
+        if len(episodes) < 2:
+            return {}
+
+        valid_files = self.get_valid_media_files(tm_torrent, episodes)
+        return {str(episode_id): file_name for episode_id, file_name in valid_files.items()}
+
     def _get_archive_function(self) -> dict:
         """get archive function based on appconfig"""
         app_config, _ = AppConfig.objects.get_or_create(single_lock=1)
@@ -91,9 +248,11 @@ class Archiver:
 
         return archive_function
 
-    def _archive_episode(self, tm_torrent: TransmissionTorrent, episode: TVEpisode, archive_func: Callable) -> None:
-        """archive tvfile"""
-        filename = self.get_valid_media_file(tm_torrent, episode)
+    def _get_episode_transfer(
+        self, tm_torrent: TransmissionTorrent, episode: TVEpisode, filename: str | None = None
+    ) -> Transfer:
+        """get source and target of tvfile, use validated filename if known"""
+        filename = filename or self.get_valid_media_file(tm_torrent, episode)
         download_path: Path = self.CONFIG["TM_BASE_FOLDER"] / filename
         if not download_path.exists():
             raise FileNotFoundError(f"didn't find expected {str(download_path)}")
@@ -101,12 +260,7 @@ class Archiver:
         episode_path = episode.get_archive_path(suffix=download_path.suffix)
         archive_path = self.CONFIG["TV_BASE_FOLDER"] / episode_path
 
-        archive_func(src_file=download_path, target_file=archive_path)
-
-        old_status = episode.status
-        episode.status = "f"
-        episode.save()
-        log_change(episode, "u", field_name="status", old_value=old_status, new_value="f")
+        return episode, download_path, archive_path
 
     def get_valid_media_file(self, tm_torrent: TransmissionTorrent, to_check: TVEpisode | Movie) -> str:
         """get valid media file"""
@@ -122,9 +276,28 @@ class Archiver:
 
         raise FileNotFoundError(f"didn't find expected media file in {tm_torrent}")
 
-    def _archive_movie(self, tm_torrent: TransmissionTorrent, movie: Movie, archive_func: Callable) -> None:
-        """archive movie"""
-        filename = self._get_valid_movie_file(tm_torrent, movie)
+    def get_valid_media_files(self, tm_torrent: TransmissionTorrent, episodes: list[TVEpisode]) -> dict[int, str]:
+        """map episode id to media file, match all files against all episodes in one batch"""
+        media_files = [
+            i.name
+            for i in tm_torrent.get_files()
+            if i.size >= self.CONFIG["MEDIA_MIN_SIZE"] and i.name.split(".")[-1] in self.CONFIG["MEDIA_EXT"]
+        ]
+        matrix = BatchMatcher(episodes).match([i.lower() for i in media_files])
+
+        valid_files = {}
+        for column, episode in enumerate(episodes):
+            rows = np.flatnonzero(matrix[:, column])
+            if rows.size:
+                valid_files[episode.id] = media_files[rows[0]]
+
+        return valid_files
+
+    def _get_movie_transfer(
+        self, tm_torrent: TransmissionTorrent, movie: Movie, filename: str | None = None
+    ) -> Transfer:
+        """get source and target of movie, use validated filename if known"""
+        filename = filename or self.get_valid_movie_file(tm_torrent, movie)
         download_path: Path = self.CONFIG["TM_BASE_FOLDER"] / filename
         if not download_path.exists():
             raise FileNotFoundError(f"didn't find expected {str(download_path)}")
@@ -132,14 +305,9 @@ class Archiver:
         movie_path = movie.get_archive_path(suffix=download_path.suffix)
         archive_path = self.CONFIG["MOVIE_BASE_FOLDER"] / movie_path
 
-        archive_func(src_file=download_path, target_file=archive_path)
-
-        old_status = movie.status
-        movie.status = "f"
-        movie.save()
-        log_change(movie, "u", field_name="status", old_value=old_status, new_value="f")
+        return movie, download_path, archive_path
 
-    def _get_valid_movie_file(self, tm_torrent: TransmissionTorrent, movie: Movie) -> str:
+    def get_valid_movie_file(self, tm_torrent: TransmissionTorrent, movie: Movie) -> str:
         """get valid media file"""
         for torrent_file in tm_torrent.get_files():
             if torrent_file.size < self.CONFIG["MEDIA_MIN_SIZE"]:
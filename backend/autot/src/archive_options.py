@@ -1,8 +1,20 @@
 """file archive functions"""
 
+import errno
+import fcntl
+import logging
 import os
 import shutil
 from pathlib import Path
+from time import perf_counter
+
+logger = logging.getLogger("django")
+
+FICLONE = 0x40049409
+BUFFER_SIZE = 8 * 1024 * 1024
+CHUNK_SIZE = 1024 * 1024 * 1024
+FALLBACK_ERRORS = {errno.EXDEV, errno.ENOSYS, errno.EINVAL, errno.EOPNOTSUPP, errno.ENOTTY, errno.EBADF, errno.EPERM}
+LINK_FALLBACK_ERRORS = {errno.EXDEV, errno.EPERM, errno.EOPNOTSUPP, errno.EMLINK}
 
 
 def _ensure_parent(target_file: Path):
@@ -10,22 +22,122 @@ def _ensure_parent(target_file: Path):
     target_file.parent.mkdir(parents=True, exist_ok=True)
 
 
+def _reflink(src_fd: int, target_fd: int) -> bool:
+    """clone extents on copy on write filesystems, no data is copied"""
+    try:
+        fcntl.ioctl(target_fd, FICLONE, src_fd)
+    except OSError as err:
+        if err.errno in FALLBACK_ERRORS:
+            return False
+        raise
+
+    return True
+
+
+def _copy_file_range(src_fd: int, target_fd: int, size: int) -> bool:
+    """copy in kernel, offloaded to the server on nfs and smb, continues from current offsets"""
+    if not hasattr(os, "copy_file_range"):
+        return False
+
+    copied = os.lseek(src_fd, 0, os.SEEK_CUR)
+    while copied < size:
+        try:
+            sent = os.copy_file_range(src_fd, target_fd, min(CHUNK_SIZE, size - copied))
+        except OSError as err:
+            if err.errno in FALLBACK_ERRORS:
+                return False
+            raise
+
+        if not sent:
+            break
+
+        copied += sent
+
+    return True
+
+
+def _sendfile(src_fd: int, target_fd: int, size: int) -> bool:
+    """copy in kernel without userspace buffers, continues from current offsets"""
+    copied = os.lseek(src_fd, 0, os.SEEK_CUR)
+    while copied < size:
+        try:
+            sent = os.sendfile(target_fd, src_fd, None, min(CHUNK_SIZE, size - copied))
+        except OSError as err:
+            if err.errno in FALLBACK_ERRORS:
+                return False
+            raise
+
+        if not sent:
+            break
+
+        copied += sent
+
+    return True
+
+
+def _drop_cache(fd: int) -> None:
+    """release page cache of transferred file, keep cache for playback"""
+    if hasattr(os, "posix_fadvise"):
+        os.posix_fadvise(fd, 0, 0, os.POSIX_FADV_DONTNEED)
+
+
+def transfer_file(src_file: Path | str, target_file: Path | str) -> str:
+    """copy content with fastest available method, return method used"""
+    size = os.stat(src_file).st_size
+    start = perf_counter()
+    with open(src_file, "rb", buffering=0) as src, open(target_file, "wb", buffering=0) as target:
+        src_fd, target_fd = src.fileno(), target.fileno()
+        if _reflink(src_fd, target_fd):
+            method = "reflink"
+        elif _copy_file_range(src_fd, target_fd, size):
+            method = "copy_file_range"
+        elif _sendfile(src_fd, target_fd, size):
+            method = "sendfile"
+        else:
+            shutil.copyfileobj(src, target, length=BUFFER_SIZE)
+            method = "buffered"
+
+        if method != "reflink":
+            os.fdatasync(target_fd)
+            _drop_cache(src_fd)
+            _drop_cache(target_fd)
+
+    elapsed = perf_counter() - start
+    logger.info(
+        "transferred %s in %.1fs, %.1f MiB/s via %s",
+        Path(src_file).name,
+        elapsed,
+        size / 1024 / 1024 / max(elapsed, 0.001),
+        method,
+    )
+
+    return method
+
+
+def _copy_with_stat(src_file: Path | str, target_file: Path | str) -> Path | str:
+    """copy content and metadata, same as shutil.copy2"""
+    transfer_file(src_file, target_file)
+    shutil.copystat(src_file, target_file)
+
+    return target_file
+
+
 def move(src_file: Path, target_file: Path):
     """mv src to target"""
     _ensure_parent(target_file)
-    shutil.move(src_file, target_file, copy_function=shutil.copyfile)
+    shutil.move(src_file, target_file, copy_function=transfer_file)
 
 
 def copy(src_file: Path, target_file: Path):
     """cp src to target"""
     _ensure_parent(target_file)
-    shutil.copy2(src_file, target_file)
+    _copy_with_stat(src_file, target_file)
 
 
 def copy_and_delete(src_file: Path, target_file: Path):
     """cp src to target, delete src for filesystem without mv"""
     _ensure_parent(target_file)
-    shutil.copy2(src_file, target_file)
+    _copy_with_stat(src_file, target_file)
     src_file.unlink()
 
 
@@ -36,3 +148,19 @@ def hard_link(src_file: Path, target_file: Path):
         target_file.unlink()
 
     os.link(src_file, target_file)
+
+
+def auto(src_file: Path, target_file: Path):
+    """hardlink on same filesystem, fall back to zero-copy copy across filesystems or without link support"""
+    _ensure_parent(target_file)
+    if src_file.stat().st_dev == target_file.parent.stat().st_dev:
+        try:
+            hard_link(src_file, target_file)
+            return
+        except OSError as err:
+            if err.errno not in LINK_FALLBACK_ERRORS:
+                raise
+
+            logger.info("hard link of %s failed, falling back to copy: %s", src_file.name, str(err))
+
+    _copy_with_stat(src_file, target_file)
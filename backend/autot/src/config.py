@@ -15,6 +15,9 @@ class ConfigType(TypedDict):
     JF_API_KEY: str
     PRR_URL: str
     PRR_KEY: str
+    PRR_CONCURRENCY: int
+    PRR_COALESCE: bool
+    PRR_RANK_WEIGHTS: str | None
     MOVIE_DB_API_KEY: str
     REDIS_CON: str
     REDIS_NAME_SPACE: str
@@ -23,8 +26,10 @@ class ConfigType(TypedDict):
     TM_USER: str
     TM_PASS: str
     TM_BASE_FOLDER: Path
+    TM_WEBHOOK_TOKEN: str | None
     TV_BASE_FOLDER: Path
     MOVIE_BASE_FOLDER: Path
+    ARCHIVE_DEVICE_CONCURRENCY: int
     APP_ROOT: Path
     TZ: str
     DJANGO_DEBUG: bool
@@ -42,6 +47,9 @@ def get_config() -> ConfigType:
         "JF_API_KEY": environ["JF_API_KEY"],
         "PRR_URL": environ["PRR_URL"],
         "PRR_KEY": environ["PRR_KEY"],
+        "PRR_CONCURRENCY": int(environ.get("PRR_CONCURRENCY", 4)),
+        "PRR_COALESCE": bool(environ.get("PRR_COALESCE", False)),
+        "PRR_RANK_WEIGHTS": environ.get("PRR_RANK_WEIGHTS"),
         "MOVIE_DB_API_KEY": environ["MOVIE_DB_API_KEY"],
         "REDIS_CON": environ.get("REDIS_CON") or "redis://localhost:6379",
         "REDIS_NAME_SPACE": "tt:",
@@ -50,8 +58,10 @@ def get_config() -> ConfigType:
         "TM_USER": environ["TM_USER"],
         "TM_PASS": environ["TM_PASS"],
         "TM_BASE_FOLDER": Path(environ["TM_BASE_FOLDER"]),
+        "TM_WEBHOOK_TOKEN": environ.get("TM_WEBHOOK_TOKEN"),
         "TV_BASE_FOLDER": Path(environ["TV_BASE_FOLDER"]),
         "MOVIE_BASE_FOLDER": Path(environ["MOVIE_BASE_FOLDER"]),
+        "ARCHIVE_DEVICE_CONCURRENCY": int(environ.get("ARCHIVE_DEVICE_CONCURRENCY", 1)),
         "APP_ROOT": Path(environ.get("APP_ROOT", "/data")),
         "TZ": environ.get("TZ", "UTC"),
         "DJANGO_DEBUG": bool(environ.get("DJANGO_DEBUG", False)),
@@ -0,0 +1,39 @@
+"""limit concurrent file transfers per filesystem device"""
+
+import threading
+from collections.abc import Iterator
+from contextlib import ExitStack, contextmanager
+from pathlib import Path
+
+
+class DeviceLimiter:
+    """semaphore per st_dev of base folders, transfers to the same disk are serialized"""
+
+    def __init__(self, source: Path, targets: list[Path], slots: int = 1):
+        self.devices: dict[Path, int] = {i: self.get_device(i) for i in [source, *targets]}
+        self.source_device = self.devices[source]
+        target_devices = {self.devices[i] for i in targets}
+        self.semaphores = {i: threading.BoundedSemaphore(slots) for i in target_devices}
+        self.capacity = slots * len(target_devices)
+        if self.source_device not in self.semaphores:
+            # independent download disk, allow a read for every target slot
+            self.semaphores[self.source_device] = threading.BoundedSemaphore(self.capacity)
+
+    @staticmethod
+    def get_device(path: Path) -> int:
+        """st_dev of path or of closest existing parent"""
+        for candidate in [path, *path.parents]:
+            if candidate.exists():
+                return candidate.stat().st_dev
+
+        raise FileNotFoundError(f"no existing parent of {path}")
+
+    @contextmanager
+    def acquire(self, target: Path) -> Iterator[None]:
+        """hold source and target device slot, acquire in device order to avoid deadlocks"""
+        devices = sorted({self.source_device, self.devices[target]})
+        with ExitStack() as stack:
+            for device in devices:
+                stack.enter_context(self.semaphores[device])
+
+            yield
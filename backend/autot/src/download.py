@@ -2,10 +2,11 @@
 
 from math import ceil
 
-from autot.models import Torrent
+from autot.models import Torrent, build_change, log_changes
 from autot.src.config import ConfigType, get_config
 from autot.src.helper import get_cached_tracker_list
 from autot.static import MovieStatus, TvEpisodeStatus
+from django.core.cache import cache
 from django.utils import timezone
 from movie.models import Movie
 from transmission_rpc import Client
@@ -19,6 +20,12 @@ class Transmission:
     CONFIG: ConfigType = get_config()
     ACTIVITY_THRESH = 3600
     TRACKER_LIST_DELAY = 300
+    STATE_FIELDS = ["status", "percentDone", "isFinished", "activityDate", "secondsDownloading", "eta"]
+    FILE_FIELDS = ["name", "files", "priorities", "wanted"]
+    POLL_MIN = 15
+    POLL_DEFAULT = 60
+    POLL_MAX = 600
+    POLL_IDLE_KEY = "download_watcher:idle"
 
     def __init__(self):
         self.transission_client = Client(
@@ -27,6 +34,9 @@ class Transmission:
             username=self.CONFIG["TM_USER"],
             password=self.CONFIG["TM_PASS"],
         )
+        self.snapshot: dict[str, TransmissionTorrent] = {}
+        self.snapshot_hashes: set[str] = set()
+        self.next_poll: int = self.POLL_DEFAULT
 
     def add_all(self) -> None:
         """add all undefined state"""
@@ -42,15 +52,32 @@ class Transmission:
         self.transission_client.add_torrent(torrent.magnet)
         torrent.torrent_state = "q"
         torrent.save()
+        cache.delete(self.POLL_IDLE_KEY)
 
     def get_single(self, torrent: Torrent) -> TransmissionTorrent | None:
-        """get single torrent instance"""
-        all_torrents = self.transission_client.get_torrents()
-        for torrent_item in all_torrents:
-            if torrent_item.hashString == torrent.magnet_hash:
-                return torrent_item
+        """get single torrent instance, from snapshot if loaded"""
+        if torrent.magnet_hash in self.snapshot_hashes:
+            return self.snapshot.get(torrent.magnet_hash)
 
-        return None
+        torrents = self.transission_client.get_torrents(ids=[torrent.magnet_hash])
+        if not torrents:
+            return None
+
+        return torrents[0]
+
+    def load_snapshot(self, hashes: list[str], arguments: list[str] | None = None) -> None:
+        """fetch torrents in one call, serve lookups of these hashes from snapshot for the rest of the run"""
+        self.snapshot.update(self.get_by_hashes(hashes, arguments))
+        self.snapshot_hashes.update(hashes)
+
+    def get_by_hashes(self, hashes: list[str], arguments: list[str] | None = None) -> dict[str, TransmissionTorrent]:
+        """get torrents by hash, all fields if no arguments, keyed by hash"""
+        if not hashes:
+            return {}
+
+        torrents = self.transission_client.get_torrents(ids=hashes, arguments=arguments)
+
+        return {i.hashString: i for i in torrents}
 
     def cancel(self, torrent: Torrent, reason: str = "Torrent canceled by application overwrite.") -> Torrent:
         """cancel and reset torrent"""
@@ -64,11 +91,11 @@ class Transmission:
     def delete(self, torrent: TransmissionTorrent) -> None:
         """delete torrent"""
         self.transission_client.remove_torrent(torrent.id, delete_data=True)
+        self.snapshot.pop(torrent.hashString, None)
 
     def update_state(self) -> tuple[bool, bool]:
         """loop through torrents update model state"""
-        in_queue = {i.hashString: i for i in self.transission_client.get_torrents()}
-        to_check = Torrent.objects.filter(torrent_state="q") | Torrent.objects.filter(torrent_state="d")
+        to_check = list(Torrent.objects.filter(torrent_state__in=["q", "d"]))
 
         needs_checking: bool = bool(to_check)
         needs_archiving: bool = False
@@ -76,15 +103,20 @@ class Transmission:
         if not needs_checking:
             return needs_checking, needs_archiving
 
+        self.load_snapshot([i.magnet_hash for i in to_check], self.STATE_FIELDS)
+        in_queue = self.snapshot
+        to_validate = [i.magnet_hash for i in to_check if not i.has_expected_files and i.magnet_hash in in_queue]
+        with_files = self.get_by_hashes(to_validate, self.FILE_FIELDS)
+
         for local_torrent in to_check:
             remote_torrent = in_queue.get(local_torrent.magnet_hash)
             if not remote_torrent:
                 local_torrent.set_to_ignore(reason="Local torrent is missing from queue.")
                 continue
 
-            has_files = remote_torrent.get_files()
-            if has_files and not local_torrent.has_expected_files:
-                self.validate_expected(remote_torrent, local_torrent)
+            remote_files = with_files.get(local_torrent.magnet_hash)
+            if remote_files and remote_files.get_files():
+                self.validate_expected(remote_files, local_torrent)
                 if local_torrent.torrent_state == "i":
                     continue
 
@@ -105,10 +137,64 @@ class Transmission:
             self.check_trackers(local_torrent, remote_torrent)
             self.check_inactive(local_torrent, remote_torrent)
 
-            local_torrent.save()
+        has_state_changes = self._save_changed(to_check)
+        self.next_poll = self._get_next_poll(to_check, has_state_changes)
 
         return needs_checking, needs_archiving
 
+    def _get_next_poll(self, torrents: list[Torrent], has_state_changes: bool) -> int:
+        """seconds to next poll, fast near completion, back off while nothing changes"""
+        if has_state_changes:
+            cache.delete(self.POLL_IDLE_KEY)
+            idle_ticks = 0
+        else:
+            cache.add(self.POLL_IDLE_KEY, 0, timeout=None)
+            idle_ticks = cache.incr(self.POLL_IDLE_KEY)
+
+        active = [i for i in torrents if i.torrent_state in ["q", "d"]]
+        if any(not i.has_expected_files for i in active):
+            # waiting on metadata to validate files
+            return self.POLL_DEFAULT
+
+        etas = []
+        for torrent in active:
+            remote_torrent = self.snapshot.get(torrent.magnet_hash)
+            if remote_torrent and remote_torrent.status.value == "downloading" and remote_torrent.eta:
+                etas.append(remote_torrent.eta.total_seconds())
+
+        if etas:
+            # poll at half the nearest eta, estimates get better closer to completion
+            return int(min(max(min(etas) / 2, self.POLL_MIN), self.POLL_MAX))
+
+        return min(self.POLL_DEFAULT * 2 ** min(idle_ticks, 4), self.POLL_MAX)
+
+    def _save_changed(self, torrents: list[Torrent]) -> bool:
+        """persist changed fields of all torrents in one update, log state changes in one batch"""
+        changed: list[Torrent] = []
+        fields: set[str] = set()
+        log_items = []
+        for torrent in torrents:
+            dirty_fields = torrent.get_dirty_fields()
+            if not dirty_fields:
+                continue
+
+            changed.append(torrent)
+            fields.update(dirty_fields)
+            if "torrent_state" in dirty_fields:
+                old_value, new_value = dirty_fields["torrent_state"]
+                log_items.append(build_change(torrent, "u", "torrent_state", old_value, new_value))
+
+        if not changed:
+            return False
+
+        Torrent.objects.bulk_update(changed, sorted(fields))
+        for torrent in changed:
+            torrent.set_clean()
+
+        log_changes(log_items)
+
+        return bool(log_items)
+
     def check_trackers(self, local_torrent: Torrent, remote_torrent: TransmissionTorrent):
         """check if torrent needs trackerlist update"""
         if local_torrent.torrent_state != "d":
@@ -162,9 +248,16 @@ class Transmission:
 
     def _check_single_episode(self, remote_torrent: TransmissionTorrent, local_torrent: Torrent) -> None:
         """check single episode"""
-        episode = TVEpisode.objects.get(torrent=local_torrent)
-        is_valid = self._is_valid(remote_torrent, to_check=episode)
-        if is_valid:
+        episodes = TVEpisode.objects.filter(torrent=local_torrent)
+        if episodes.count() > 1:
+            # multi episode release linked to more than one episode
+            self._check_multi_episode(remote_torrent, local_torrent)
+            return
+
+        episode = episodes.get()
+        valid_file = self._get_valid_file(remote_torrent, to_check=episode)
+        if valid_file:
+            local_torrent.file_map = {str(episode.id): valid_file}
             local_torrent.has_expected_files = True
             local_torrent.save()
             return
@@ -178,27 +271,37 @@ class Transmission:
 
     def _check_multi_episode(self, remote_torrent: TransmissionTorrent, local_torrent: Torrent) -> None:
         """check multi episode torrent"""
-        episodes = TVEpisode.objects.filter(torrent=local_torrent)
-        for episode in episodes:
-            is_valid = self._is_valid(remote_torrent, to_check=episode)
-            if is_valid:
-                continue
+        from autot.src.archive import Archiver
 
-            self.cancel(local_torrent)
-            episodes.update(status=TvEpisodeStatus.s.name)
-            local_torrent.has_expected_files = False
-            local_torrent.message = "Torrent does not contain expected episodes files."
+        episodes = TVEpisode.objects.filter(torrent=local_torrent)
+        valid_files = Archiver().get_valid_media_files(remote_torrent, list(episodes))
+        if len(valid_files) == len(episodes):
+            self.set_wanted_files(remote_torrent, set(valid_files.values()))
+            local_torrent.file_map = {str(episode_id): file_name for episode_id, file_name in valid_files.items()}
+            local_torrent.has_expected_files = True
             local_torrent.save()
             return
 
-        local_torrent.has_expected_files = True
+        self.cancel(local_torrent)
+        episodes.update(status=TvEpisodeStatus.s.name)
+        local_torrent.has_expected_files = False
+        local_torrent.message = "Torrent does not contain expected episodes files."
         local_torrent.save()
 
+    def set_wanted_files(self, remote_torrent: TransmissionTorrent, wanted: set[str]) -> None:
+        """skip download of all other files, like extras, samples and episodes not needed"""
+        unwanted = [i.id for i in remote_torrent.get_files() if i.name not in wanted]
+        if not unwanted:
+            return
+
+        self.transission_client.change_torrent(remote_torrent.id, files_unwanted=unwanted)
+
     def _check_single_movie(self, remote_torrent: TransmissionTorrent, local_torrent: Torrent) -> None:
         """check single movie"""
         movie = Movie.objects.get(torrent=local_torrent)
-        is_valid = self._is_valid(remote_torrent, to_check=movie)
-        if is_valid:
+        valid_file = self._get_valid_file(remote_torrent, to_check=movie)
+        if valid_file:
+            local_torrent.file_map = {str(movie.id): valid_file}
             local_torrent.has_expected_files = True
             local_torrent.save()
             return
@@ -210,14 +313,16 @@ class Transmission:
         local_torrent.message = "Torrent does not contain expected movie file."
         local_torrent.save()
 
-    def _is_valid(self, remote_torrent: TransmissionTorrent, to_check: Movie | TVEpisode) -> bool:
-        """check for expected"""
+    def _get_valid_file(self, remote_torrent: TransmissionTorrent, to_check: Movie | TVEpisode) -> str | None:
+        """get expected file name if in torrent"""
         from autot.src.archive import Archiver
 
         try:
-            Archiver().get_valid_media_file(remote_torrent, to_check)
-            return True
+            if isinstance(to_check, Movie):
+                return Archiver().get_valid_movie_file(remote_torrent, to_check)
+
+            return Archiver().get_valid_media_file(remote_torrent, to_check)
         except FileNotFoundError:
             pass
 
-        return False
+        return None
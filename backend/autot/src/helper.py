@@ -60,6 +60,11 @@ def title_clean(title) -> str:
     return title.lower().replace(".", " ").replace(":", "").replace(" & ", " ").replace("!", "")
 
 
+def normalize_name(name: str) -> str:
+    """normalize name for index lookup, only lower alphanumeric words"""
+    return " ".join(re.sub(r"[^a-z0-9]+", " ", title_clean(name)).split())
+
+
 def bool_converter(bool_str: str | None) -> bool | None:
     """convert to bool if possible, else none"""
     if bool_str is None:
@@ -0,0 +1,141 @@
+"""record indexer performance, select indexers worth querying"""
+
+import logging
+import random
+from collections import Counter
+
+import requests
+from autot.src.config import ConfigType, get_config
+from autot.src.prowlarr import CircuitBreaker, ProwlarrClient
+from autot.src.redis_con import AutotRedis
+from django.conf import settings
+from django.core.cache import cache
+
+logger = logging.getLogger("django")
+
+
+class IndexerStats:
+    """per category search stats by indexer in redis, drop slow and useless indexers from auto searches"""
+
+    CONFIG: ConfigType = get_config()
+    KEY: str = "indexer:stats:"
+    EXPIRE: int = 60 * 60 * 24 * 30
+    MIN_SEARCHES: int = 20
+    MIN_RESULTS_PER_SEARCH: float = 0.5
+    MAX_RESPONSE_MS: int = 10000
+    EXPLORE_RATE: float = 0.1
+
+    def __init__(self):
+        self.redis = AutotRedis()
+
+    def record_search(self, category: int, indexer_ids: list[int] | None, results: list[dict]) -> None:
+        """count search and results for every queried indexer"""
+        queried = indexer_ids or self.get_enabled_ids()
+        if not queried:
+            return
+
+        result_counts = Counter(i.get("indexerId") for i in results)
+        increments = {}
+        for indexer_id in queried:
+            increments[f"{indexer_id}:searches"] = 1
+            increments[f"{indexer_id}:results"] = result_counts.get(indexer_id, 0)
+
+        self.redis.increment_hash_messages(f"{self.KEY}{category}", increments, expire=self.EXPIRE)
+
+    def record_hit(self, category: int, result: dict) -> None:
+        """count indexer of chosen magnet"""
+        indexer_id = result.get("indexerId")
+        if indexer_id is None:
+            return
+
+        self.redis.increment_hash_messages(f"{self.KEY}{category}", {f"{indexer_id}:hits": 1}, expire=self.EXPIRE)
+
+    def get_stats(self, category: int) -> dict[int, dict[str, int]]:
+        """get searches, results and hits by indexer id"""
+        stats: dict[int, dict[str, int]] = {}
+        for field, value in (self.redis.get_hash_message(f"{self.KEY}{category}") or {}).items():
+            indexer_id, _, metric = field.partition(":")
+            indexer_stats = stats.setdefault(int(indexer_id), {"searches": 0, "results": 0, "hits": 0})
+            indexer_stats[metric] = int(value)
+
+        return stats
+
+    def select(self, category: int) -> list[int] | None:
+        """get indexer ids worth querying for category, None to query all"""
+        enabled = self.get_enabled_ids()
+        if not enabled or random.random() < self.EXPLORE_RATE:
+            # keep exploring, dropped indexers can recover
+            return None
+
+        stats = self.get_stats(category)
+        response_times = self.get_response_times()
+        selected = [
+            i
+            for i in enabled
+            if self._is_useful(stats.get(i), response_times.get(i)) and not CircuitBreaker(f"indexer:{i}").is_open()
+        ]
+        if not selected or len(selected) == len(enabled):
+            return None
+
+        logger.info("Skipping indexer(s) %s for category %s", sorted(set(enabled) - set(selected)), category)
+
+        return selected
+
+    def get_scores(self, category: int) -> dict[int, float]:
+        """hit rate by indexer id relative to best indexer, 0 to 1, only indexers with enough searches"""
+        hit_rates = {
+            indexer_id: indexer_stats["hits"] / indexer_stats["searches"]
+            for indexer_id, indexer_stats in self.get_stats(category).items()
+            if indexer_stats["searches"] >= self.MIN_SEARCHES
+        }
+        best = max(hit_rates.values(), default=0)
+        if not best:
+            return {}
+
+        return {indexer_id: hit_rate / best for indexer_id, hit_rate in hit_rates.items()}
+
+    def _is_useful(self, indexer_stats: dict[str, int] | None, response_time: int | None) -> bool:
+        """keep indexers without enough data, with hits, or fast with enough results"""
+        if not indexer_stats or indexer_stats["searches"] < self.MIN_SEARCHES:
+            return True
+
+        if indexer_stats["hits"]:
+            return True
+
+        if response_time and response_time > self.MAX_RESPONSE_MS:
+            return False
+
+        return indexer_stats["results"] / indexer_stats["searches"] >= self.MIN_RESULTS_PER_SEARCH
+
+    def get_enabled_ids(self) -> list[int]:
+        """get enabled indexer ids from prowlarr"""
+        indexers = self._get_cached("api/v1/indexer") or []
+        return [i["id"] for i in indexers if i.get("enable")]
+
+    def get_response_times(self) -> dict[int, int]:
+        """get average response time in ms by indexer id as tracked by prowlarr"""
+        indexer_stats = self._get_cached("api/v1/indexerstats") or {}
+        return {i["indexerId"]: i.get("averageResponseTime", 0) for i in indexer_stats.get("indexers", [])}
+
+    def _get_cached(self, path: str) -> list | dict | None:
+        """get prowlarr api response, cached"""
+        key = f"prowlarr:{path}"
+        cached = cache.get(key)
+        if cached is not None:
+            return cached
+
+        url = f"{self.CONFIG['PRR_URL']}/{path}?apikey={self.CONFIG['PRR_KEY']}"
+        try:
+            response = ProwlarrClient().get(url)
+        except (ValueError, requests.exceptions.RequestException) as err:
+            logger.error("failed to get prowlarr %s: %s", path, str(err))
+            return None
+
+        if not response.ok:
+            logger.error("failed to get prowlarr %s: status %s", path, response.status_code)
+            return None
+
+        data = response.json()
+        cache.set(key, data, timeout=settings.CACHE_TTL)
+
+        return data
@@ -0,0 +1,70 @@
+"""batch match release titles and file names against media items"""
+
+from typing import TYPE_CHECKING, NotRequired, TypedDict
+
+import numpy as np
+from autot.src.release_name import ReleaseName, parse_release
+from rapidfuzz import fuzz, process
+
+if TYPE_CHECKING:
+    from movie.models import Movie
+    from tv.models import TVEpisode, TVSeason
+
+
+class MatchTarget(TypedDict):
+    """describe what a valid path for a media item looks like"""
+
+    query: str
+    always_fuzzy: bool
+    season: NotRequired[int]
+    episode: NotRequired[int]
+    date: NotRequired[str]
+    year: NotRequired[int]
+    complete: NotRequired[bool]
+
+
+def is_identifier_match(release: ReleaseName, target: MatchTarget, single_episode: bool = False) -> bool:
+    """compare parsed release identifiers with target, any matching identifier is valid"""
+    if target.get("complete") and release.is_complete:
+        return True
+
+    if (date := target.get("date")) and release.date == date:
+        return True
+
+    if "episode" in target and release.has_episode(target["season"], target["episode"]):
+        # multi episode release would be linked to each episode as single episode torrent
+        return not single_episode or len(release.episodes) == 1
+
+    if (year := target.get("year")) and year in release.years:
+        return True
+
+    return False
+
+
+class BatchMatcher:
+    """score all titles against all targets in one native call"""
+
+    FUZZY_RATIO = 95
+
+    def __init__(self, to_match: list["TVEpisode | TVSeason | Movie"]):
+        self.targets: list[MatchTarget] = [i.get_match_target() for i in to_match]
+
+    def match(self, titles: list[str], strict: bool = False, single_episode: bool = False) -> np.ndarray:
+        """boolean matrix, rows by titles, columns by targets, single_episode rejects episode ranges"""
+        releases = [parse_release(i) for i in titles]
+        matrix = np.zeros((len(releases), len(self.targets)), dtype=bool)
+        if not releases or not self.targets:
+            return matrix
+
+        close_enough = np.ones_like(matrix)
+        fuzzy_columns = [i for i, target in enumerate(self.targets) if strict or target["always_fuzzy"]]
+        if fuzzy_columns:
+            cleaned = [i.cleaned for i in releases]
+            queries = [self.targets[i]["query"] for i in fuzzy_columns]
+            scores = process.cdist(cleaned, queries, scorer=fuzz.partial_ratio, workers=-1)
+            close_enough[:, fuzzy_columns] = scores > self.FUZZY_RATIO
+
+        for row, column in zip(*np.nonzero(close_enough)):
+            matrix[row, column] = is_identifier_match(releases[row], self.targets[column], single_episode)
+
+        return matrix
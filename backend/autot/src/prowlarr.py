@@ -0,0 +1,145 @@
+"""prowlarr api client"""
+
+import logging
+import threading
+from time import sleep
+
+import requests
+from autot.src.config import ConfigType, get_config
+from django.core.cache import cache
+from requests.adapters import HTTPAdapter
+
+logger = logging.getLogger("django")
+
+
+class ProwlarrUnavailable(ValueError):
+    """circuit is open, request was not sent"""
+
+
+class CircuitBreaker:
+    """count failures in shared cache, open circuit for cooldown after threshold is reached"""
+
+    FAILURE_THRESHOLD: int = 5
+    FAILURE_WINDOW: int = 120
+    COOLDOWN: int = 300
+
+    def __init__(self, name: str):
+        self.name = name
+        self.failures_key = f"circuit:{name}:failures"
+        self.open_key = f"circuit:{name}:open"
+
+    def is_open(self) -> bool:
+        """check if requests should be short circuited"""
+        return cache.get(self.open_key) is not None
+
+    def record_success(self) -> None:
+        """reset failure count"""
+        cache.delete(self.failures_key)
+
+    def record_failure(self) -> None:
+        """count failure, open circuit at threshold"""
+        cache.add(self.failures_key, 0, timeout=self.FAILURE_WINDOW)
+        failures = cache.incr(self.failures_key)
+        if failures < self.FAILURE_THRESHOLD:
+            return
+
+        logger.warning("%s failed %s times, pausing requests for %ss", self.name, failures, self.COOLDOWN)
+        cache.set(self.open_key, True, timeout=self.COOLDOWN)
+        cache.delete(self.failures_key)
+
+
+class RetryBudget:
+    """allow retries as share of requests, retries can't multiply load on a failing upstream"""
+
+    RATIO: float = 0.2
+    MIN_TOKENS: float = 3
+    MAX_TOKENS: float = 10
+
+    def __init__(self):
+        self.tokens = self.MIN_TOKENS
+        self.lock = threading.Lock()
+
+    def deposit(self) -> None:
+        """add share of a retry for every request"""
+        with self.lock:
+            self.tokens = min(self.MAX_TOKENS, self.tokens + self.RATIO)
+
+    def withdraw(self) -> bool:
+        """take one retry if available"""
+        with self.lock:
+            if self.tokens < 1:
+                return False
+
+            self.tokens -= 1
+            return True
+
+
+class ProwlarrClient:
+    """pooled keep alive session shared by all threads of the process, bounded retries, circuit breaker"""
+
+    CONFIG: ConfigType = get_config()
+    CONNECT_TIMEOUT: int = 10
+    TIMEOUT: int = 120
+    RETRIES: int = 2
+    RETRY_BACKOFF: int = 2
+    RETRY_STATUS: set[int] = {429, 500, 502, 503, 504}
+    POOL_SIZE: int = 20
+
+    _session: requests.Session | None = None
+    _session_lock = threading.Lock()
+    retry_budget = RetryBudget()
+
+    @classmethod
+    def get_session(cls) -> requests.Session:
+        """get shared session, create on first use"""
+        with cls._session_lock:
+            if cls._session is None:
+                session = requests.Session()
+                adapter = HTTPAdapter(pool_connections=4, pool_maxsize=cls.POOL_SIZE)
+                session.mount("http://", adapter)
+                session.mount("https://", adapter)
+                cls._session = session
+
+        return cls._session
+
+    def get(
+        self,
+        url: str,
+        circuit: str = "prowlarr",
+        timeout: int | None = None,
+        allow_redirects: bool = True,
+        retries: int | None = None,
+    ) -> requests.Response:
+        """get request, retry transient failures while budget allows, pass retries=0 for tight timeouts"""
+        breaker = CircuitBreaker(circuit)
+        if breaker.is_open():
+            raise ProwlarrUnavailable(f"{circuit} is unavailable, skipping request")
+
+        self.retry_budget.deposit()
+        session = self.get_session()
+        request_timeout = (self.CONNECT_TIMEOUT, timeout or self.TIMEOUT)
+        max_retries = self.RETRIES if retries is None else retries
+
+        for attempt in range(max_retries + 1):
+            try:
+                response = session.get(url, timeout=request_timeout, allow_redirects=allow_redirects)
+                error = None
+            except (requests.exceptions.ConnectionError, requests.exceptions.Timeout) as err:
+                response, error = None, err
+
+            if response is not None and response.status_code not in self.RETRY_STATUS:
+                breaker.record_success()
+                return response
+
+            if attempt == max_retries or not self.retry_budget.withdraw():
+                break
+
+            delay = self.RETRY_BACKOFF * 2**attempt
+            logger.info("%s request failed, retry in: %s sec", circuit, delay)
+            sleep(delay)
+
+        breaker.record_failure()
+        if response is not None:
+            return response
+
+        raise error
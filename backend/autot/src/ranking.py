@@ -0,0 +1,123 @@
+"""rank search results by composite score"""
+
+import logging
+import zoneinfo
+from datetime import datetime
+
+import numpy as np
+from autot.src.config import ConfigType, get_config
+from django.utils import timezone
+
+logger = logging.getLogger("django")
+
+
+class ReleaseRanker:
+    """score all results in one vectorized pass over seeders, size, age and indexer"""
+
+    CONFIG: ConfigType = get_config()
+    DEFAULT_WEIGHTS: dict[str, float] = {
+        "seeders": 1.0,
+        "size": 1.0,
+        "age": 0.2,
+        "indexer": 0.5,
+    }
+    AGE_HALF_LIFE_DAYS: int = 30
+    UNKNOWN_INDEXER_SCORE: float = 0.5
+
+    def __init__(
+        self,
+        target_size: tuple[float | None, float | None] = (None, None),
+        indexer_scores: dict[int, float] | None = None,
+    ):
+        self.lower, self.upper = target_size
+        self.indexer_scores = indexer_scores or {}
+        self.weights = self.get_weights()
+
+    def get_weights(self) -> dict[str, float]:
+        """parse weights from config like 'seeders:1,size:1,age:0.2,indexer:0.5'"""
+        weights = self.DEFAULT_WEIGHTS.copy()
+        weights_str = self.CONFIG["PRR_RANK_WEIGHTS"]
+        if not weights_str:
+            return weights
+
+        for weight_item in weights_str.split(","):
+            key, _, value = weight_item.partition(":")
+            key = key.strip()
+            if key not in weights:
+                logger.error("unknown rank weight '%s', expected one of %s", key, list(weights))
+                continue
+
+            try:
+                weights[key] = float(value)
+            except ValueError:
+                logger.error("invalid rank weight value for '%s': %s", key, value)
+
+        return weights
+
+    def rank(self, results: list[dict]) -> list[dict]:
+        """set score on results, return sorted by score, highest first"""
+        if not results:
+            return results
+
+        seeders = np.array([i.get("seeders") or 0 for i in results], dtype=float)
+        size_gb = np.array([i.get("size") or 0 for i in results], dtype=float) / 1024 / 1024 / 1024
+        age_days = np.array([self._get_age_days(i) for i in results], dtype=float)
+        indexer = np.array(
+            [self.indexer_scores.get(i.get("indexerId"), self.UNKNOWN_INDEXER_SCORE) for i in results], dtype=float
+        )
+
+        scores = (
+            self.weights["seeders"] * self._score_seeders(seeders)
+            + self.weights["size"] * self._score_size(size_gb)
+            + self.weights["age"] * self._score_age(age_days)
+            + self.weights["indexer"] * indexer
+        )
+
+        for result, score in zip(results, scores):
+            result["score"] = round(float(score), 4)
+
+        order = np.argsort(-scores, kind="stable")
+
+        return [results[i] for i in order]
+
+    def _score_seeders(self, seeders: np.ndarray) -> np.ndarray:
+        """log scaled relative to best seeded result, 0 to 1"""
+        max_seeders = seeders.max()
+        if max_seeders <= 0:
+            return np.zeros_like(seeders)
+
+        return np.log1p(seeders) / np.log1p(max_seeders)
+
+    def _score_size(self, size_gb: np.ndarray) -> np.ndarray:
+        """closeness to target size center, 1 at center, 0.5 at bounds, 0 if unknown target"""
+        if not self.lower or not self.upper or self.upper <= self.lower:
+            return np.zeros_like(size_gb)
+
+        center = (self.lower + self.upper) / 2
+        tolerance = self.upper - self.lower
+
+        return np.clip(1 - np.abs(size_gb - center) / tolerance, 0, 1)
+
+    def _score_age(self, age_days: np.ndarray) -> np.ndarray:
+        """prefer recent releases, halves every AGE_HALF_LIFE_DAYS"""
+        return np.power(0.5, age_days / self.AGE_HALF_LIFE_DAYS)
+
+    @staticmethod
+    def _get_age_days(result: dict) -> float:
+        """get age in days from result"""
+        if (age := result.get("age")) is not None:
+            return max(float(age), 0)
+
+        publish_date = result.get("publishDate")
+        if not publish_date:
+            return 0
+
+        try:
+            published = datetime.fromisoformat(publish_date)
+        except ValueError:
+            return 0
+
+        if timezone.is_naive(published):
+            published = published.replace(tzinfo=zoneinfo.ZoneInfo("UTC"))
+
+        return max((timezone.now() - published).total_seconds() / 86400, 0)
@@ -45,6 +45,10 @@ class AutotRedis(RedisBase):
         if expire:
             self.conn.expire(redis_key, expire)
 
+    def add_message(self, key: str, message: str, expire: int) -> bool:
+        """set single message only if key does not exist"""
+        return bool(self.conn.set(f"{self.NAME_SPACE}{key}", message, ex=expire, nx=True))
+
     def get_message(self, key: str) -> str | None:
         """get message by key"""
         return self.conn.get(f"{self.NAME_SPACE}{key}")
@@ -94,3 +98,15 @@ class AutotRedis(RedisBase):
     def get_hash_message(self, key: str) -> dict | None:
         """get complete hash message"""
         return self.conn.hgetall(f"{self.NAME_SPACE}{key}")
+
+    def increment_hash_messages(self, key: str, increments: dict[str, int], expire: bool | int = False) -> None:
+        """increment hash fields in one pipeline"""
+        redis_key = f"{self.NAME_SPACE}{key}"
+        with self.conn.pipeline() as pipe:
+            for hash_key, amount in increments.items():
+                pipe.hincrby(redis_key, hash_key, amount)
+
+            if expire:
+                pipe.expire(redis_key, expire)
+
+            pipe.execute()
@@ -0,0 +1,83 @@
+"""match recent indexer releases against wanted items"""
+
+import logging
+from typing import Self
+
+from autot.src.release_name import parse_release
+from autot.src.search import SearchIndex
+from movie.models import Movie
+from tv.models import TVEpisode
+
+logger = logging.getLogger("django")
+
+
+class WantedIndex:
+    """in memory index of searching episodes and movies by normalized name and identifier"""
+
+    def __init__(self):
+        self.index: dict[tuple[str, str], list[TVEpisode | Movie]] = {}
+
+    def build(self) -> Self:
+        """build index from items in searching state"""
+        episodes = TVEpisode.objects.filter(status="s").select_related("season__show")
+        for episode in episodes:
+            self.add(self._parse_key(episode.search_query), episode)
+
+        for movie in Movie.objects.filter(status="s", release_date__isnull=False):
+            self.add(self._parse_key(movie.search_query), movie)
+
+        return self
+
+    def add(self, key: tuple[str, str] | None, item: TVEpisode | Movie) -> None:
+        """add item by key"""
+        if not key:
+            return
+
+        self.index.setdefault(key, []).append(item)
+
+    def match(self, title: str) -> list[TVEpisode | Movie]:
+        """get wanted items matching release title"""
+        key = self._parse_key(title)
+        if not key:
+            return []
+
+        return self.index.get(key, [])
+
+    def _parse_key(self, title: str) -> tuple[str, str] | None:
+        """parsed name and SxxEyy, date or year identifier"""
+        release = parse_release(title)
+        if not release.name or not release.identifier:
+            return None
+
+        return release.name, release.identifier
+
+
+class ReleaseFeed:
+    """poll indexer feeds instead of searching each wanted item"""
+
+    def poll(self) -> bool:
+        """match recent releases, add magnets for wanted items"""
+        wanted = WantedIndex().build()
+        if not wanted.index:
+            return False
+
+        search_index = SearchIndex()
+        releases = search_index.get_recent_releases()
+        logger.info("Matching %s recent release(s) against %s wanted item(s)", len(releases), len(wanted.index))
+
+        candidates: dict[tuple[str, int], tuple[TVEpisode | Movie, list[dict]]] = {}
+        for release in releases:
+            for item in wanted.match(release.get("title", "")):
+                candidate_key = (item._meta.model_name, item.pk)
+                candidates.setdefault(candidate_key, (item, []))[1].append(release)
+
+        found_magnets = False
+        for item, results in candidates.values():
+            magnet, title = search_index.get_magnet_from_results(item, results)
+            if not magnet:
+                continue
+
+            item.add_magnet(magnet, title)
+            found_magnets = True
+
+        return found_magnets
@@ -0,0 +1,139 @@
+"""parse release names into structured records"""
+
+import re
+from functools import lru_cache
+
+from autot.src.helper import normalize_name, title_clean
+
+
+class ReleaseName:
+    """parsed release title or file path, compact and immutable by convention"""
+
+    __slots__ = (
+        "title",
+        "cleaned",
+        "name",
+        "season",
+        "episodes",
+        "date",
+        "years",
+        "resolution",
+        "codec",
+        "group",
+        "is_complete",
+    )
+
+    def __init__(self, title: str):
+        self.title: str = title
+        self.cleaned: str = title_clean(title)
+        self.name: str = ""
+        self.season: int | None = None
+        self.episodes: range = range(0)
+        self.date: str | None = None
+        self.years: tuple[int, ...] = ()
+        self.resolution: str | None = None
+        self.codec: str | None = None
+        self.group: str | None = None
+        self.is_complete: bool = False
+
+    def __repr__(self) -> str:
+        return f"<ReleaseName: {self.name} {self.identifier}>"
+
+    @property
+    def year(self) -> int | None:
+        """last year in title, earlier years are likely part of the name"""
+        return self.years[-1] if self.years else None
+
+    @property
+    def identifier(self) -> str | None:
+        """SxxEyy, date or year identifier"""
+        if self.season is not None and self.episodes:
+            return f"s{self.season}e{self.episodes.start}"
+
+        if self.date:
+            return self.date
+
+        if self.year:
+            return str(self.year)
+
+        return None
+
+    def has_episode(self, season_number: int, episode_number: int) -> bool:
+        """check if release contains episode, episode ranges included"""
+        return self.season == season_number and episode_number in self.episodes
+
+
+class ReleaseNameParser:
+    """extract identifiers from normalized title in one pass each"""
+
+    EPISODE_PATTERN = re.compile(r"\bs(?P<season>\d{1,2}) ?e(?P<first>\d{1,3})(?: ?e(?P<last>\d{1,3}))*\b")
+    CROSS_PATTERN = re.compile(r"\b(?P<season>\d{1,2})x(?P<first>\d{1,3})\b")
+    SEASON_PATTERN = re.compile(r"\b(?:s|season )(?P<season>\d{1,2})\b")
+    DATE_PATTERN = re.compile(r"\b(?P<date>(?:19|20)\d{2} \d{2} \d{2})\b")
+    YEAR_PATTERN = re.compile(r"\b(?P<year>(?:19|20)\d{2})\b")
+    RESOLUTION_PATTERN = re.compile(r"\b(?P<resolution>2160p|1080p|1080i|720p|576p|480p|4k)\b")
+    CODEC_PATTERN = re.compile(r"\b(?P<codec>x264|x265|h ?264|h ?265|hevc|avc|av1|xvid|vp9)\b")
+    GROUP_PATTERN = re.compile(r"-(?P<group>[a-z0-9]+)(?:\.[a-z0-9]{2,4})?$", re.IGNORECASE)
+
+    def parse(self, title: str) -> ReleaseName:
+        """parse title or file path, identifiers of file name take precedence over folders"""
+        release = ReleaseName(title)
+        full = normalize_name(title)
+        basename = title.rsplit("/", 1)[-1]
+        normalized = normalize_name(basename) if basename != title else full
+        name_end = self._parse_identifiers(release, normalized)
+        if release.season is None and release.identifier is None and normalized != full:
+            # no identifier in file name, use folder
+            normalized = full
+            name_end = self._parse_identifiers(release, normalized)
+
+        if match := self.RESOLUTION_PATTERN.search(normalized):
+            release.resolution = match.group("resolution")
+            name_end = min(name_end, match.start())
+        elif match := self.RESOLUTION_PATTERN.search(full):
+            release.resolution = match.group("resolution")
+
+        if match := self.CODEC_PATTERN.search(full):
+            release.codec = match.group("codec").replace(" ", "")
+
+        if match := self.GROUP_PATTERN.search(basename):
+            release.group = match.group("group").lower()
+
+        release.name = normalized[:name_end].strip()
+        release.is_complete = "complete" in release.cleaned
+
+        return release
+
+    def _parse_identifiers(self, release: ReleaseName, normalized: str) -> int:
+        """set episode, season, date and years, return end of name"""
+        name_end = len(normalized)
+        if match := self.EPISODE_PATTERN.search(normalized) or self.CROSS_PATTERN.search(normalized):
+            first = int(match.group("first"))
+            last = int(match.groupdict().get("last") or first)
+            release.season = int(match.group("season"))
+            release.episodes = range(first, max(first, last) + 1)
+            name_end = min(name_end, match.start())
+        elif match := self.SEASON_PATTERN.search(normalized):
+            release.season = int(match.group("season"))
+            name_end = min(name_end, match.start())
+
+        date_span = range(0)
+        if match := self.DATE_PATTERN.search(normalized):
+            release.date = match.group("date")
+            date_span = range(*match.span())
+            name_end = min(name_end, match.start())
+
+        year_matches = [i for i in self.YEAR_PATTERN.finditer(normalized) if i.start() not in date_span]
+        if year_matches:
+            release.years = tuple(int(i.group("year")) for i in year_matches)
+            if normalized[: year_matches[-1].start()].strip():
+                # year only ends the name if a name remains, like show "1923"
+                name_end = min(name_end, year_matches[-1].start())
+
+        return name_end
+
+
+@lru_cache(maxsize=8192)
+def parse_release(title: str) -> ReleaseName:
+    """parse release title, memoized as the same titles repeat across search, download and archive"""
+    return ReleaseNameParser().parse(title)
@@ -1,16 +1,25 @@
 """search for magnet links in index"""
 
+import asyncio
 import json
 import logging
+import re
+from collections.abc import AsyncIterator
+from concurrent.futures import ThreadPoolExecutor
 from hashlib import md5
-from urllib.parse import quote
+from time import time
+from urllib.parse import parse_qs, quote, urlencode, urlparse
 
 import requests
+from asgiref.sync import sync_to_async
 from autot.models import Torrent, log_change
 from autot.src.config import ConfigType, get_config
 from autot.src.helper import get_magnet_hash
+from autot.src.indexer_stats import IndexerStats
+from autot.src.matcher import BatchMatcher
+from autot.src.prowlarr import ProwlarrClient
 from autot.src.redis_con import AutotRedis
-from django.db.models import QuerySet
+from autot.src.search_filter import SearchFilter
 from movie.models import Movie
 from tv.models import TVEpisode, TVSeason
 
@@ -20,7 +29,11 @@ logger = logging.getLogger("django")
 class SearchIndex:
     """implement prowlarr search indexer"""
 
-    TIMEOUT: int = 300
+    COALESCE_MIN_EPISODES: int = 2
+    MAGNET_CANDIDATES: int = 5
+    MAGNET_TIMEOUT: int = 30
+    QUERY_CACHE_FRESH: int = 300
+    QUERY_CACHE_STALE: int = 1800
     CONFIG: ConfigType = get_config()
     CATEGORY_MAP: dict[str, int] = {
         "episode": 5000,
@@ -28,12 +41,20 @@ class SearchIndex:
         "movie": 2000,
     }
 
+    def __init__(self):
+        self.client = ProwlarrClient()
+        self.indexer_stats = IndexerStats()
+        self.indexer_selection: dict[int, list[int] | None] = {}
+        self.indexer_scores: dict[int, dict[int, float]] = {}
+        self.missed: set[tuple[str, int]] = set()
+        self.fetched: set[str] = set()
+
     def ping(self):
         """ping prowlarr, check auth"""
         base = self.CONFIG["PRR_URL"]
         key = self.CONFIG["PRR_KEY"]
         url = f"{base}/api/v1/system/status?apikey={key}"
-        response = requests.get(url, timeout=self.TIMEOUT)
+        response = self.client.get(url)
         if not response.ok:
             message = f"Prowlarr request failed: response '{response.text}' with status {response.status_code}"
             raise ValueError(message)
@@ -42,6 +63,38 @@ class SearchIndex:
 
     def free_search(self, search_term: str, category: str | None) -> list[dict]:
         """free form search"""
+        url = self._build_free_search_url(search_term, category)
+        results = self.make_request(url)
+        if results:
+            self._cache_free_search(results)
+
+        return results
+
+    async def free_search_stream(self, search_term: str, category: str | None) -> AsyncIterator[list[dict]]:
+        """free form search, query indexers individually, yield results as each indexer answers"""
+        indexer_ids = await sync_to_async(self.indexer_stats.get_enabled_ids)()
+        if not indexer_ids:
+            yield await sync_to_async(self.free_search)(search_term, category)
+            return
+
+        urls = [self._build_free_search_url(search_term, category, [i]) for i in indexer_ids]
+        executor = ThreadPoolExecutor(max_workers=min(len(urls), self.client.POOL_SIZE))
+        futures = [asyncio.wrap_future(executor.submit(self._make_request_safe, url)) for url in urls]
+        try:
+            for future in asyncio.as_completed(futures):
+                results = await future
+                if not results:
+                    continue
+
+                await sync_to_async(self._cache_free_search)(results)
+                yield results
+        finally:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+    def _build_free_search_url(
+        self, search_term: str, category: str | None, indexer_ids: list[int] | None = None
+    ) -> str:
+        """build free search url, category is optional"""
         base = self.CONFIG["PRR_URL"]
         key = self.CONFIG["PRR_KEY"]
         query = quote(search_term)
@@ -50,11 +103,10 @@ class SearchIndex:
             if media_category := self.CATEGORY_MAP.get(category):
                 url += f"&categories={media_category}"
 
-        results = self.make_request(url)
-        if results:
-            self._cache_free_search(results)
+        if indexer_ids:
+            url += "".join(f"&indexerIds={i}" for i in indexer_ids)
 
-        return results
+        return url
 
     def _cache_free_search(self, results):
         """cache in redis for ID lookup"""
@@ -62,51 +114,293 @@ class SearchIndex:
         AutotRedis().set_messages(messages, expire=3600)
 
     def get_magnet(self, to_search: TVEpisode | TVSeason | Movie) -> tuple[str | None, str | None]:
-        """get episode magnet link"""
-        to_ignore = []
+        """get magnet link for single item"""
+        return self.get_magnets([to_search], concurrency=1)[0]
+
+    def get_magnets(
+        self, to_search_list: list[TVEpisode | TVSeason | Movie], concurrency: int | None = None
+    ) -> list[tuple[str | None, str | None]]:
+        """get magnet links, network requests run in parallel, db access stays on calling thread"""
+        if not to_search_list:
+            return []
+
+        max_workers = concurrency or self.CONFIG["PRR_CONCURRENCY"]
+        to_ignore_list = [self._get_to_ignore(to_search) for to_search in to_search_list]
+        search_filters = [SearchFilter(to_search) for to_search in to_search_list]
+        urls = [
+            self.build_url(to_search, search_filter) for to_search, search_filter in zip(to_search_list, search_filters)
+        ]
+
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            results_list = list(executor.map(self._make_request_safe, urls))
+
+            valid_results_list = []
+            for to_search, search_filter, url, results in zip(to_search_list, search_filters, urls, results_list):
+                if results is None:
+                    valid_results_list.append(None)
+                    continue
+
+                self._record_search(self._get_category(to_search), url, results)
+
+                valid_results = self.validate_links(results, to_search, search_filter)
+                if not valid_results:
+                    self.missed.add(self._get_item_key(to_search))
+                    log_change(to_search, "u", comment="No valid magnet option found.")
+
+                valid_results_list.append(valid_results)
+
+            magnets = self._drop_duplicate_magnets(
+                list(executor.map(self._extract_first_magnet, valid_results_list, to_ignore_list))
+            )
+
+        for to_search, valid_results, (_, title) in zip(to_search_list, valid_results_list, magnets):
+            self._record_hit(self._get_category(to_search), valid_results, title)
+
+        return magnets
+
+    def is_missed(self, to_search: TVEpisode | TVSeason | Movie) -> bool:
+        """search succeeded without valid results, failed requests and magnet downloads are not a miss"""
+        return self._get_item_key(to_search) in self.missed
+
+    @staticmethod
+    def _get_item_key(to_search: TVEpisode | TVSeason | Movie) -> tuple[str, int]:
+        """unique key across models"""
+        return to_search._meta.label, to_search.pk
+
+    def get_magnet_from_results(
+        self, to_search: TVEpisode | TVSeason | Movie, results: list[dict]
+    ) -> tuple[str | None, str | None]:
+        """get magnet from already fetched results, not queried with include keywords of item"""
+        search_filter = SearchFilter(to_search, check_include=True)
+        valid_results = self.validate_links(results, to_search, search_filter)
+        return self._extract_first_magnet(valid_results, self._get_to_ignore(to_search))
+
+    def get_recent_releases(self) -> list[dict]:
+        """get recent releases of all indexers, empty query returns indexer feeds"""
+        results = []
+        for category in sorted(set(self.CATEGORY_MAP.values())):
+            url = self._build_search_url("", category)
+            results.extend(self._make_request_safe(url, use_cache=False) or [])
+
+        return results
+
+    def get_episode_magnets(
+        self, episodes: list[TVEpisode], concurrency: int | None = None
+    ) -> list[tuple[str | None, str | None]]:
+        """get episode magnets, coalesce to one query per season if enabled"""
+        if not self.CONFIG["PRR_COALESCE"]:
+            return self.get_magnets(episodes, concurrency)
+
+        magnets = self._get_coalesced_magnets(episodes, concurrency)
+        remaining = [i for i in episodes if i.id not in magnets]
+        if remaining:
+            logger.info("Coalesced search matched %s of %s episode(s)", len(magnets), len(episodes))
+            magnets.update(zip([i.id for i in remaining], self.get_magnets(remaining, concurrency)))
+
+        return [magnets[i.id] for i in episodes]
+
+    def _get_coalesced_magnets(
+        self, episodes: list[TVEpisode], concurrency: int | None = None
+    ) -> dict[int, tuple[str, str | None]]:
+        """search once per season, assign matching results to every waiting episode of season"""
+        groups = self._group_by_season(episodes)
+        if not groups:
+            return {}
+
+        max_workers = concurrency or self.CONFIG["PRR_CONCURRENCY"]
+        urls = [self.build_season_episodes_url(group[0].season) for group in groups]
+
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            results_list = list(executor.map(self._make_request_safe, urls))
+
+            matched, valid_results_list = [], []
+            for group, url, results in zip(groups, urls, results_list):
+                if not results:
+                    continue
+
+                self._record_search(self._get_category(group[0]), url, results)
+                titles = [i["title"] for i in results]
+                path_matrix = BatchMatcher(group).match(titles, strict=True, single_episode=True)
+                for column, episode in enumerate(group):
+                    # season query has season keywords, episode keywords can differ
+                    search_filter = SearchFilter(episode, check_include=True)
+                    valid_results = search_filter.filter(results, path_valid=path_matrix[:, column])
+                    if valid_results:
+                        matched.append(episode)
+                        indexer_scores = self._get_indexer_scores(self._get_category(episode))
+                        valid_results_list.append(search_filter.rank(valid_results, indexer_scores))
+
+            to_ignore_list = [self._get_to_ignore(episode) for episode in matched]
+            extracted = list(executor.map(self._extract_first_magnet, valid_results_list, to_ignore_list))
+
+        magnets = self._get_unique_magnets(matched, extracted)
+        for episode, valid_results, (_, title) in zip(matched, valid_results_list, extracted):
+            if episode.id in magnets:
+                self._record_hit(self._get_category(episode), valid_results, title)
+
+        return magnets
+
+    def _get_unique_magnets(
+        self, episodes: list[TVEpisode], extracted: list[tuple[str | None, str | None]]
+    ) -> dict[int, tuple[str, str | None]]:
+        """map episode id to magnet, skip magnets already assigned to another episode"""
+        magnets = {}
+        seen_hashes = set()
+        for episode, (magnet, title) in zip(episodes, extracted):
+            if not magnet:
+                continue
+
+            magnet_hash = get_magnet_hash(magnet)
+            if magnet_hash in seen_hashes:
+                # multi episode file, search single
+                continue
+
+            seen_hashes.add(magnet_hash)
+            magnets[episode.id] = (magnet, title)
+
+        return magnets
+
+    @staticmethod
+    def _drop_duplicate_magnets(
+        magnets: list[tuple[str | None, str | None]],
+    ) -> list[tuple[str | None, str | None]]:
+        """one item per magnet, keep first, a torrent can't be linked to many items as single item torrent"""
+        seen_hashes = set()
+        unique = []
+        for magnet, title in magnets:
+            if magnet:
+                magnet_hash = get_magnet_hash(magnet)
+                if magnet_hash in seen_hashes:
+                    unique.append((None, None))
+                    continue
+
+                seen_hashes.add(magnet_hash)
+
+            unique.append((magnet, title))
+
+        return unique
+
+    def _group_by_season(self, episodes: list[TVEpisode]) -> list[list[TVEpisode]]:
+        """group episodes by season where coalescing is possible"""
+        groups: dict[int, list[TVEpisode]] = {}
+        for episode in episodes:
+            if episode.season.show.is_daily:
+                continue
+
+            groups.setdefault(episode.season_id, []).append(episode)
+
+        return [group for group in groups.values() if len(group) >= self.COALESCE_MIN_EPISODES]
+
+    def _get_to_ignore(self, to_search: TVEpisode | TVSeason | Movie) -> list[str]:
+        """get magnet hashes previously ignored for item"""
         if isinstance(to_search, (TVEpisode, Movie)):
-            to_ignore = [i.magnet_hash for i in to_search.torrent.filter(torrent_state="i")]
-        elif isinstance(to_search, TVSeason):
+            return [i.magnet_hash for i in to_search.torrent.filter(torrent_state="i")]
+
+        if isinstance(to_search, TVSeason):
             torrents = Torrent.objects.filter(torrent_state="i", torrent_type="s", torrent_tv__season=to_search)
-            to_ignore = [i.magnet_hash for i in torrents]
+            return [i.magnet_hash for i in torrents]
 
-        url = self.build_url(to_search)
-        results = self.make_request(url)
-        valid_results = self.validate_links(results, to_search)
+        return []
+
+    def _get_indexer_ids(self, category: int) -> list[int] | None:
+        """select indexers once per category and instance, stats are recorded against the same selection"""
+        if category not in self.indexer_selection:
+            self.indexer_selection[category] = self.indexer_stats.select(category)
+
+        return self.indexer_selection[category]
+
+    def _get_indexer_scores(self, category: int) -> dict[int, float]:
+        """get indexer ranking scores once per category and instance"""
+        if category not in self.indexer_scores:
+            self.indexer_scores[category] = self.indexer_stats.get_scores(category)
+
+        return self.indexer_scores[category]
+
+    def _record_search(self, category: int, url: str, results: list[dict]) -> None:
+        """record search results by indexer, skip results served from query cache"""
+        if url not in self.fetched:
+            return
+
+        self.indexer_stats.record_search(category, self._get_indexer_ids(category), results)
+
+    def _record_hit(self, category: int, valid_results: list[dict] | None, title: str | None) -> None:
+        """record indexer of chosen result"""
+        if not valid_results or not title:
+            return
+
+        chosen = next((i for i in valid_results if i.get("title") == title), None)
+        if chosen:
+            self.indexer_stats.record_hit(category, chosen)
+
+    def _make_request_safe(self, url: str, use_cache: bool = True) -> list[dict] | None:
+        """make request in worker thread, don't fail whole batch"""
+        try:
+            return self.make_request(url, use_cache=use_cache)
+        except (ValueError, requests.exceptions.RequestException) as err:
+            logger.error("Prowlarr search request failed: %s", str(err))
+
+        return None
+
+    def _extract_first_magnet(
+        self, valid_results: list[dict] | None, to_ignore: list[str]
+    ) -> tuple[str | None, str | None]:
+        """extract highest ranked valid magnet not on ignore list, resolve in batches"""
         if not valid_results:
-            log_change(to_search, "u", comment="No valid magnet option found.")
             return None, None
 
-        for result in valid_results:
-            try:
-                magnet, title = self.extract_magnet(result)
-                if not magnet:
-                    continue
+        for start in range(0, len(valid_results), self.MAGNET_CANDIDATES):
+            end = start + self.MAGNET_CANDIDATES
+            candidates = valid_results[start:end]
+            magnet, title = self._extract_candidates(candidates, to_ignore)
+            if magnet:
+                return magnet, title
 
-                if get_magnet_hash(magnet) in to_ignore:
+        return None, None
+
+    def _extract_candidates(self, candidates: list[dict], to_ignore: list[str]) -> tuple[str | None, str | None]:
+        """resolve candidates concurrently, return on first valid in rank order, cancel the rest"""
+        executor = ThreadPoolExecutor(max_workers=len(candidates))
+        futures = [executor.submit(self.extract_magnet, i, self.MAGNET_TIMEOUT) for i in candidates]
+        try:
+            for future in futures:
+                try:
+                    magnet, title = future.result()
+                    if magnet and get_magnet_hash(magnet) not in to_ignore:
+                        return magnet, title
+                except (ValueError, requests.exceptions.RequestException):
                     continue
+        finally:
+            executor.shutdown(wait=False, cancel_futures=True)
 
-                return magnet, title
-            except ValueError:
-                continue
+        return None, None
 
-        return magnet, title
-
-    def build_url(self, to_search: TVEpisode | TVSeason) -> str:
+    def build_url(self, to_search: TVEpisode | TVSeason | Movie, search_filter: SearchFilter | None = None) -> str:
         """build jacket search url"""
+        search_filter = search_filter or SearchFilter(to_search)
+        category = self._get_category(to_search)
+
+        return self._build_search_url(search_filter.query, category, self._get_indexer_ids(category))
+
+    def build_season_episodes_url(self, season: TVSeason) -> str:
+        """build search url matching all episodes of season"""
+        show_name = season.show.search_name or season.show.name
+        key_words = " ".join([i.word for i in season.get_keywords() if i.direction == "i"])
+        query = f"{show_name} S{str(season.number).zfill(2)} {key_words}"
+
+        category = self._get_category(season)
+
+        return self._build_search_url(query, category, self._get_indexer_ids(category))
+
+    def _build_search_url(self, query: str, category: int, indexer_ids: list[int] | None = None) -> str:
+        """build search url from query, limit to indexer ids if given"""
         base = self.CONFIG["PRR_URL"]
         key = self.CONFIG["PRR_KEY"]
-        key_words = self._parse_keywords(to_search.get_keywords())
-        query = quote(f"{to_search.search_query} {key_words}")
-        category = self._get_category(to_search)
-        url = f"{base}/api/v1/search?apikey={key}&query={query}&categories={category}"
+        url = f"{base}/api/v1/search?apikey={key}&query={quote(query)}&categories={category}"
+        if indexer_ids:
+            url += "".join(f"&indexerIds={i}" for i in indexer_ids)
 
         return url
 
-    def _parse_keywords(self, keywords: QuerySet) -> str | None:
-        """join keywords from query set"""
-        return " ".join([i.word for i in keywords if i.direction == "i"])
-
     def _get_category(self, to_search: TVEpisode | TVSeason | Movie) -> int:
         """get category for jackett"""
         if isinstance(to_search, (TVEpisode, TVSeason)):
@@ -116,12 +410,71 @@ class SearchIndex:
 
         raise NotImplementedError
 
-    def make_request(self, url) -> list[dict]:
-        """make request against jackett api"""
-        response = requests.get(url, timeout=self.TIMEOUT)
+    def make_request(self, url: str, use_cache: bool = True) -> list[dict]:
+        """make request against prowlarr api, serve from query cache, revalidate stale in background"""
+        if not use_cache:
+            return self._fetch_results(url)
+
+        key = self._get_query_cache_key(url)
+        cached = AutotRedis().get_message(key)
+        if not cached:
+            return self.refresh_query_cache(url)
+
+        cached_search = json.loads(cached)
+        is_stale = time() - cached_search["fetched"] > self.QUERY_CACHE_FRESH
+        if is_stale and AutotRedis().add_message(f"{key}:refresh", "1", expire=self.QUERY_CACHE_FRESH):
+            from autot.tasks import refresh_search
+
+            # pass query params only, job arguments are stored and logged, url has api key
+            params = self._get_query_params(url)
+            refresh_search.delay(params["query"], params["categories"], params["indexerIds"])
+
+        return cached_search["results"]
+
+    def refresh_query_cache(self, url: str) -> list[dict]:
+        """fetch results and store in query cache"""
+        results = self._fetch_results(url)
+        key = self._get_query_cache_key(url)
+        message = json.dumps({"fetched": time(), "results": results})
+        AutotRedis().set_message(key, message, expire=self.QUERY_CACHE_STALE)
+
+        return results
+
+    def refresh_query(self, query: str, categories: list[str], indexer_ids: list[str]) -> list[dict]:
+        """rebuild authenticated search url from query params, refresh query cache"""
+        params = {"apikey": self.CONFIG["PRR_KEY"], "query": query, "categories": categories, "indexerIds": indexer_ids}
+        url = f"{self.CONFIG['PRR_URL']}/api/v1/search?{urlencode(params, doseq=True, quote_via=quote)}"
+
+        return self.refresh_query_cache(url)
+
+    @staticmethod
+    def _get_query_params(url: str) -> dict[str, list[str]]:
+        """query, categories and indexer ids of search url, without api key"""
+        params = parse_qs(urlparse(url).query)
+        return {
+            "query": params.get("query", [""])[0],
+            "categories": params.get("categories", []),
+            "indexerIds": params.get("indexerIds", []),
+        }
+
+    def _get_query_cache_key(self, url: str) -> str:
+        """key by normalized query, category and indexer set, independent of parameter order"""
+        params = self._get_query_params(url)
+        query = re.sub(r"\s+", " ", params["query"].lower()).strip()
+        categories = ",".join(sorted(params["categories"]))
+        indexer_ids = ",".join(sorted(params["indexerIds"], key=int))
+        query_hash = md5(f"{query}|{categories}|{indexer_ids}".encode()).hexdigest()
+
+        return f"search:query:{query_hash}"
+
+    def _fetch_results(self, url: str) -> list[dict]:
+        """fetch results from prowlarr, add id and gain"""
+        response = self.client.get(url)
         if not response.ok:
             raise ValueError
 
+        self.fetched.add(url)
+
         results = response.json()
         for result in results:
             hex_hash = md5(json.dumps(result).encode()).digest().hex()
@@ -132,46 +485,35 @@ class SearchIndex:
 
         return results_sorted
 
-    def extract_magnet(self, result: dict) -> tuple[str | None, str | None]:
+    def extract_magnet(self, result: dict, timeout: int | None = None) -> tuple[str | None, str | None]:
         """extract magnet from list or results"""
         magnet_link = result.get("magnetUrl") or result.get("downloadUrl")
         if not magnet_link:
             raise ValueError("failed to extract magnet link URL")
 
-        response = requests.get(magnet_link, allow_redirects=False, timeout=self.TIMEOUT)
+        indexer_id = result.get("indexerId")
+        circuit = f"indexer:{indexer_id}" if indexer_id is not None else "prowlarr"
+        # no retries, ranked candidates are resolved in parallel with a tight timeout
+        response = self.client.get(magnet_link, circuit=circuit, timeout=timeout, allow_redirects=False, retries=0)
         if not response.ok:
             raise ValueError(f"request failed with status {response.status_code}: {response.text}")
 
         magnet_link = response.headers.get("Location")
-        if not magnet_link.startswith("magnet:"):
+        if not magnet_link or not magnet_link.startswith("magnet:"):
             raise ValueError(f"malformed magnet link found: {magnet_link}")
 
         return magnet_link, result.get("title")
 
-    def validate_links(self, results: list[dict], to_search: TVEpisode | TVSeason) -> list[dict] | None:
+    def validate_links(
+        self,
+        results: list[dict],
+        to_search: TVEpisode | TVSeason | Movie,
+        search_filter: SearchFilter | None = None,
+    ) -> list[dict] | None:
         """validate for auto tasks"""
-        valid_magnets = list(filter(lambda result: self._filter_magnets(result, to_search), results))
+        search_filter = search_filter or SearchFilter(to_search)
+        valid_magnets = search_filter.filter(results)
         if not valid_magnets:
             return None
 
-        return valid_magnets
-
-    @staticmethod
-    def _filter_magnets(result_item: dict, to_search: TVEpisode | TVSeason | Movie) -> bool:
-        """filter function to remove poor results"""
-        has_magnet = result_item.get("guid")
-        has_seeders = result_item.get("seeders", 0) > 2
-        has_gain = result_item.get("gain", 0) > 1
-        is_valid_path = to_search.is_valid_path(result_item["title"], strict=True)
-
-        is_filesize_target = True
-        if hasattr(to_search, "target_file_size"):
-            lower, upper = to_search.target_file_size
-            if lower and upper and result_item.get("size"):
-                size_is = result_item["size"] / 1024 / 1024 / 1024
-                is_filesize_target = size_is >= lower and size_is <= upper
-
-        to_exclude = [i.word for i in to_search.get_keywords().filter(direction="e")]
-        is_not_excluded = not any(i for i in to_exclude if i in result_item["title"])
-
-        return all([has_magnet, has_seeders, has_gain, is_valid_path, is_not_excluded, is_filesize_target])
+        return search_filter.rank(valid_magnets, self._get_indexer_scores(self._get_category(to_search)))
@@ -0,0 +1,83 @@
+"""compiled search result filter"""
+
+from collections.abc import Sequence
+
+from autot.src.helper import normalize_name
+from autot.src.matcher import BatchMatcher
+from autot.src.ranking import ReleaseRanker
+from movie.models import Movie
+from tv.models import TVEpisode, TVSeason
+
+
+class SearchFilter:
+    """filter compiled once per search item, applied to results without db lookups"""
+
+    MIN_SEEDERS: int = 2
+    MIN_GAIN: int = 1
+
+    def __init__(self, to_search: TVEpisode | TVSeason | Movie, check_include: bool = False):
+        self.to_search = to_search
+        keywords = list(to_search.get_keywords())
+        self.include: list[str] = [i.word for i in keywords if i.direction == "i"]
+        self.exclude: list[str] = [i.word for i in keywords if i.direction == "e"]
+        self.check_include = check_include
+        self.include_normalized: list[str] = [f" {normalize_name(i)} " for i in self.include]
+        self.lower, self.upper = to_search.target_file_size
+        self.search_query: str = to_search.search_query
+
+    @property
+    def query(self) -> str:
+        """search query extended by include keywords"""
+        return f"{self.search_query} {' '.join(self.include)}"
+
+    def filter(self, results: list[dict], path_valid: Sequence[bool] | None = None) -> list[dict]:
+        """apply filter on result list, path validation can be precomputed for many items in batch"""
+        if path_valid is not None:
+            return [i for i, is_path in zip(results, path_valid) if is_path and self.is_valid(i)]
+
+        candidates = [i for i in results if self.is_valid(i)]
+        titles = [i["title"] for i in candidates]
+        path_valid = BatchMatcher([self.to_search]).match(titles, strict=True, single_episode=True)[:, 0]
+
+        return [i for i, is_path in zip(candidates, path_valid) if is_path]
+
+    def rank(self, results: list[dict], indexer_scores: dict[int, float] | None = None) -> list[dict]:
+        """rank valid results by composite score against target size and indexer hit rate"""
+        ranker = ReleaseRanker(target_size=(self.lower, self.upper), indexer_scores=indexer_scores)
+        return ranker.rank(results)
+
+    def is_valid(self, result_item: dict) -> bool:
+        """filter function to remove poor results, path is validated in batch"""
+        if not result_item.get("guid"):
+            return False
+
+        if not result_item.get("seeders", 0) > self.MIN_SEEDERS:
+            return False
+
+        if not result_item.get("gain", 0) > self.MIN_GAIN:
+            return False
+
+        if not self.is_filesize_target(result_item.get("size")):
+            return False
+
+        title = result_item["title"]
+        if any(i for i in self.exclude if i in title):
+            return False
+
+        if self.check_include and not self.is_included(title):
+            return False
+
+        return True
+
+    def is_included(self, title: str) -> bool:
+        """all include keywords in title, for results not fetched with the query of this item"""
+        normalized = f" {normalize_name(title)} "
+        return all(i in normalized for i in self.include_normalized)
+
+    def is_filesize_target(self, size: int | None) -> bool:
+        """check size in bytes against target bounds"""
+        if not self.lower or not self.upper or not size:
+            return True
+
+        size_is = size / 1024 / 1024 / 1024
+        return self.lower <= size_is <= self.upper
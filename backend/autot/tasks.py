@@ -1,7 +1,7 @@
 """all generic reoccuring tasks"""
 
 import logging
-from datetime import timedelta
+from datetime import datetime, timedelta, timezone
 
 from artwork.models import Artwork
 from artwork.src.cleanup import cleanup_art
@@ -9,6 +9,8 @@ from autot.src.archive import Archiver
 from autot.src.download import Transmission
 from autot.src.media_server import EpisodeIdentify, MediaServerIdentify, MovieIdentify
 from autot.src.redis_con import AutotRedis
+from autot.src.release_feed import ReleaseFeed
+from autot.src.search import SearchIndex
 from django_rq import job
 from django_rq.queues import get_queue
 from people.src.cleanup import cleanup_people
@@ -16,8 +18,8 @@ from people.src.cleanup import cleanup_people
 logger = logging.getLogger("django")
 
 
-def is_pending(queue_name: str, func_name: str) -> bool:
-    """check if a job is already scheduled"""
+def is_pending(queue_name: str, func_name: str, within: timedelta | None = None) -> bool:
+    """check if a job is already scheduled, optionally within time window"""
     queue = get_queue(queue_name)
     all_job_ids = queue.scheduled_job_registry.get_job_ids()
     for job_id in all_job_ids:
@@ -26,11 +28,25 @@ def is_pending(queue_name: str, func_name: str) -> bool:
             continue
 
         if job_queued.func_name == f"autot.tasks.{func_name}" and job_queued.is_scheduled:
-            return True
+            if within is None:
+                return True
+
+            scheduled_time = queue.scheduled_job_registry.get_scheduled_time(job_queued)
+            if scheduled_time - datetime.now(tz=timezone.utc) <= within:
+                return True
 
     return False
 
 
+def remove_scheduled(queue_name: str, func_name: str) -> None:
+    """remove scheduled jobs of func"""
+    queue = get_queue(queue_name)
+    for job_id in queue.scheduled_job_registry.get_job_ids():
+        job_queued = queue.fetch_job(job_id)
+        if job_queued and job_queued.func_name == f"autot.tasks.{func_name}":
+            queue.scheduled_job_registry.remove(job_queued, delete_job=True)
+
+
 @job
 def run_archiver() -> None:
     """archive torrents"""
@@ -40,17 +56,29 @@ def run_archiver() -> None:
         queue.enqueue_in(timedelta(seconds=60), media_server_identify)
 
 
+@job
+def torrent_done(magnet_hash: str) -> None:
+    """archive single torrent on done hook"""
+    archived = Archiver().archive_by_hash(magnet_hash)
+    if archived:
+        queue = get_queue("default")
+        queue.enqueue_in(timedelta(seconds=60), media_server_identify)
+
+
 @job
 def download_watcher() -> None:
-    """watch download queue"""
-    if is_pending("default", "download_watcher"):
+    """watch download queue, reschedule adaptive to eta and activity"""
+    if is_pending("default", "download_watcher", within=timedelta(seconds=Transmission.POLL_DEFAULT)):
         logger.info("download_watcher job is already scheduled, exiting...")
         return
 
-    needs_checking, needs_archiving = Transmission().update_state()
+    # run now instead of a backed off poll, new torrents get checked promptly
+    remove_scheduled("default", "download_watcher")
+    tm = Transmission()
+    needs_checking, needs_archiving = tm.update_state()
     if needs_checking:
         queue = get_queue("default")
-        queue.enqueue_in(timedelta(seconds=60), download_watcher)
+        queue.enqueue_in(timedelta(seconds=tm.next_poll), download_watcher)
 
     if needs_archiving:
         run_archiver.delay()
@@ -90,3 +118,19 @@ def cleanup() -> None:
 def clear_cache() -> None:
     """clear cache"""
     AutotRedis().delete_messages_pattern("*")
+
+
+@job("default")
+def poll_release_feed() -> None:
+    """match recent indexer releases against wanted items"""
+    found_magnets = ReleaseFeed().poll()
+    if found_magnets:
+        Transmission().add_all()
+        queue = get_queue("default")
+        queue.enqueue_in(timedelta(seconds=60), download_watcher)
+
+
+@job("default")
+def refresh_search(query: str, categories: list[str], indexer_ids: list[str]) -> None:
+    """revalidate stale cached search query, url with api key is built in job"""
+    SearchIndex().refresh_query(query, categories, indexer_ids)
@@ -0,0 +1,178 @@
+"""autot tests"""
+
+from types import SimpleNamespace
+from unittest import mock
+
+from autot.models import Torrent
+from autot.src.archive import Archiver
+from autot.src.matcher import BatchMatcher, MatchTarget
+from autot.src.release_feed import WantedIndex
+from autot.src.release_name import parse_release
+from autot.src.search import SearchIndex
+from django.test import SimpleTestCase, TestCase, override_settings
+
+LOCMEM_CACHE = {"default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}}
+
+
+class EpisodeItem:
+    """stand in for TVEpisode match target"""
+
+    def __init__(self, season: int, episode: int):
+        self.season = season
+        self.episode = episode
+
+    def get_match_target(self) -> MatchTarget:
+        """episode target"""
+        return MatchTarget(query="show", always_fuzzy=False, season=self.season, episode=self.episode)
+
+
+class MultiEpisodeSearchTest(SimpleTestCase):
+    """multi episode releases are not single episode search results"""
+
+    def test_search_rejects_episode_range(self):
+        """S01E01E02 release is valid for neither episode in search"""
+        matcher = BatchMatcher([EpisodeItem(1, 1), EpisodeItem(1, 2)])
+        matrix = matcher.match(["Show S01E01E02 1080p WEB h264-GRP"], strict=True, single_episode=True)
+        self.assertEqual(matrix.tolist(), [[False, False]])
+
+    def test_search_accepts_single_episode(self):
+        """single episode release still valid in search"""
+        matcher = BatchMatcher([EpisodeItem(1, 1), EpisodeItem(1, 2)])
+        matrix = matcher.match(["Show S01E02 1080p WEB h264-GRP"], strict=True, single_episode=True)
+        self.assertEqual(matrix.tolist(), [[False, True]])
+
+    def test_file_matches_episode_range(self):
+        """multi episode file in pack is valid for all contained episodes"""
+        matcher = BatchMatcher([EpisodeItem(1, 1), EpisodeItem(1, 2)])
+        matrix = matcher.match(["show s01e01e02 1080p web h264-grp.mkv"])
+        self.assertEqual(matrix.tolist(), [[True, True]])
+
+    def test_drop_duplicate_magnets(self):
+        """magnet chosen for many items is only kept for first"""
+        magnet = "magnet:?xt=urn:btih:ABCDEF&dn=Show.S01E01E02"
+        other = "magnet:?xt=urn:btih:123456&dn=Show.S01E03"
+        magnets = [(magnet, "first"), (magnet, "second"), (other, "third"), (None, None)]
+        expected = [(magnet, "first"), (None, None), (other, "third"), (None, None)]
+        self.assertEqual(SearchIndex._drop_duplicate_magnets(magnets), expected)
+
+
+class PackFilePathTest(SimpleTestCase):
+    """episode identifiers of files in packs come from file name before folder"""
+
+    def test_file_name_before_folder_range(self):
+        """episode range in folder doesn't apply to files with own identifier"""
+        release = parse_release("show s01e01-e03 1080p web h264-grp/show s01e02 1080p web h264-grp.mkv")
+        self.assertEqual(release.season, 1)
+        self.assertEqual(release.episodes, range(2, 3))
+
+    def test_cross_single_digit_episode(self):
+        """1x5 form is episode 5 of season 1"""
+        release = parse_release("show 1x5 720p hdtv x264-grp")
+        self.assertEqual(release.season, 1)
+        self.assertEqual(release.episodes, range(5, 6))
+
+    def test_folder_fallback(self):
+        """file without identifier uses folder"""
+        release = parse_release("show s01e04 1080p web h264-grp/grp-show.mkv")
+        self.assertEqual(release.episodes, range(4, 5))
+
+    def test_pack_files_map_to_own_episode(self):
+        """each file of pack with range in folder matches only its own episode"""
+        folder = "show.s01e01-e03.1080p.web.h264-grp"
+        files = [f"{folder}/show.s01e0{i}.1080p.web.h264-grp.mkv" for i in range(1, 4)]
+        matcher = BatchMatcher([EpisodeItem(1, i) for i in range(1, 4)])
+        matrix = matcher.match(files)
+        self.assertEqual(matrix.tolist(), [[True, False, False], [False, True, False], [False, False, True]])
+
+
+class YearNameTest(SimpleTestCase):
+    """names made of a year are kept"""
+
+    def test_year_show_name(self):
+        """show named 1923 has name and episode key"""
+        release = parse_release("1923.S01E02.1080p.WEB.h264-GRP")
+        self.assertEqual(release.name, "1923")
+        self.assertEqual(release.identifier, "s1e2")
+
+    def test_year_show_feed_match(self):
+        """feed release of show named 1923 matches wanted episode"""
+        wanted = WantedIndex()
+        wanted.add(wanted._parse_key("1923 S01E02"), "episode")
+        self.assertEqual(wanted.match("1923.S01E02.1080p.WEB.h264-GRP"), ["episode"])
+
+    def test_year_movie_name(self):
+        """movie named 1917 keeps name, release year is identifier"""
+        release = parse_release("1917.2019.1080p.BluRay.x264-GRP")
+        self.assertEqual(release.name, "1917")
+        self.assertEqual(release.year, 2019)
+
+
+class QueryCacheRefreshTest(SimpleTestCase):
+    """stale query refresh is queued without api key"""
+
+    def test_refresh_params_rebuild_same_query(self):
+        """refresh job args have no api key, rebuilt url has same cache key"""
+        search_index = SearchIndex()
+        with (
+            mock.patch.dict(SearchIndex.CONFIG, {"PRR_KEY": "secret-api-key"}),
+            mock.patch.object(SearchIndex, "refresh_query_cache") as refresh_query_cache,
+        ):
+            url = search_index._build_search_url("Show Name S01E02 1080p", 5000, [3, 1])
+            params = search_index._get_query_params(url)
+            search_index.refresh_query(params["query"], params["categories"], params["indexerIds"])
+
+        self.assertNotIn("secret-api-key", str(params))
+        rebuilt_url = refresh_query_cache.call_args.args[0]
+        self.assertIn("apikey=secret-api-key", rebuilt_url)
+        self.assertEqual(search_index._get_query_cache_key(rebuilt_url), search_index._get_query_cache_key(url))
+
+
+@override_settings(CACHES=LOCMEM_CACHE)
+class TorrentDoneTest(TestCase):
+    """done hook archives completed torrents still seeding if the archive keeps the torrent"""
+
+    MAGNET_HASH = "abcdef0123456789abcdef0123456789abcdef01"
+
+    def setUp(self):
+        self.torrent = Torrent.objects.create(
+            magnet=f"magnet:?xt=urn:btih:{self.MAGNET_HASH}&dn=Movie.2019.1080p",
+            torrent_type="m",
+            torrent_state="d",
+            has_expected_files=True,
+        )
+
+    def _archive_by_hash(self, tm_torrent: SimpleNamespace, operation: str) -> tuple[bool, mock.MagicMock]:
+        """run done hook against fake transmission torrent"""
+        archive_options = Archiver.ARCHIVE_METHOD[operation]
+        with (
+            mock.patch("autot.src.archive.Transmission") as transmission,
+            mock.patch.object(Archiver, "_get_archive_function", return_value=archive_options),
+            mock.patch.object(Archiver, "archive_single_torrent") as archive_single,
+        ):
+            transmission.return_value.get_single.return_value = tm_torrent
+            archived = Archiver().archive_by_hash(self.MAGNET_HASH)
+
+        return archived, archive_single
+
+    def test_seeding_torrent_archived(self):
+        """completed download still seeding is archived with copy"""
+        seeding = SimpleNamespace(is_finished=False, percent_done=1.0)
+        archived, archive_single = self._archive_by_hash(seeding, "c")
+        self.assertTrue(archived)
+        archive_single.assert_called_once()
+        self.torrent.refresh_from_db()
+        self.assertEqual(self.torrent.torrent_state, "f")
+
+    def test_seeding_torrent_waits_for_move(self):
+        """move removes torrent, wait for seeding to stop"""
+        seeding = SimpleNamespace(is_finished=False, percent_done=1.0)
+        archived, archive_single = self._archive_by_hash(seeding, "m")
+        self.assertFalse(archived)
+        archive_single.assert_not_called()
+
+    def test_downloading_torrent_skipped(self):
+        """incomplete download is left to download watcher"""
+        downloading = SimpleNamespace(is_finished=False, percent_done=0.5)
+        archived, archive_single = self._archive_by_hash(downloading, "c")
+        self.assertFalse(archived)
+        archive_single.assert_not_called()
@@ -19,5 +19,6 @@ urlpatterns.extend(
         path("appstatus/", views.AppStatusView.as_view(), name="appstatus"),
         path("tasks/", views.TaskView.as_view(), name="tasks"),
         path("progress/", views.QueueProgress.as_view(), name="queue-progress"),
+        path("torrent-done/", views.TorrentDoneView.as_view(), name="torrent-done"),
     ]
 )
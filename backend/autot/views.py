@@ -1,5 +1,8 @@
 """all api views"""
 
+import hmac
+import json
+
 import django_rq
 from autot.models import (
     ActionLog,
@@ -20,9 +23,12 @@ from autot.serializers import (
     TargetBitrateSerializer,
     TorrentSerializer,
 )
+from autot.src.config import get_config
 from autot.src.search import SearchIndex
 from autot.static import TASK_OPTIONS
+from autot.tasks import torrent_done
 from django.conf import settings
+from django.http import StreamingHttpResponse
 from rest_framework import mixins, viewsets
 from rest_framework.decorators import action
 from rest_framework.pagination import PageNumberPagination
@@ -153,20 +159,42 @@ class TorrentViewSet(
     @action(detail=False, methods=["post"])
     def search(self, request, **kwargs):
         """free search, this is slow"""
-        data = request.data
+        message = self._validate_search(request.data)
+        if message:
+            return Response({"message": message}, status=400)
+
+        results = SearchIndex().free_search(request.data["search_term"], category=request.data["category"])
+        return Response(results)
+
+    @action(detail=False, methods=["post"], url_path="search-stream")
+    def search_stream(self, request, **kwargs):
+        """free search, stream results as ndjson, one line per answering indexer"""
+        message = self._validate_search(request.data)
+        if message:
+            return Response({"message": message}, status=400)
+
+        stream = SearchIndex().free_search_stream(request.data["search_term"], category=request.data["category"])
+
+        async def lines():
+            async for results in stream:
+                yield json.dumps(results) + "\n"
+
+        # async iterator, sync generators are consumed in full before sending under asgi
+        return StreamingHttpResponse(lines(), content_type="application/x-ndjson")
+
+    @staticmethod
+    def _validate_search(data) -> str | None:
+        """validate search request body, return error message"""
         if not data:
-            return Response({"message": "missing request body"}, status=400)
+            return "missing request body"
 
-        search_term = data.get("search_term")
-        if not search_term:
-            return Response({"message": "missing search_term"}, status=400)
+        if not data.get("search_term"):
+            return "missing search_term"
 
-        category = data.get("category")
-        if not category:
-            return Response({"message": "missing category"}, status=400)
+        if not data.get("category"):
+            return "missing category"
 
-        results = SearchIndex().free_search(search_term, category=category)
-        return Response(results)
+        return None
 
     @action(detail=True, methods=["get"])
     def actionlog(self, request, **kwargs):
@@ -245,6 +273,31 @@ class QueueProgress(APIView):
         return Response({"pending_jobs": total_pending})
 
 
+class TorrentDoneView(APIView):
+    """torrent done webhook, token authenticated"""
+
+    authentication_classes = []
+    permission_classes = [AllowAny]
+
+    def post(self, request, *args, **kwargs):
+        """trigger archive of finished torrent"""
+        token = get_config()["TM_WEBHOOK_TOKEN"]
+        if not token:
+            return Response({"message": "webhook not configured"}, status=404)
+
+        auth_header = request.headers.get("Authorization", "")
+        if not hmac.compare_digest(auth_header.encode(), f"Bearer {token}".encode()):
+            return Response({"message": "invalid token"}, status=403)
+
+        magnet_hash = request.data.get("hash")
+        if not magnet_hash:
+            return Response({"message": "missing hash"}, status=400)
+
+        job = torrent_done.delay(magnet_hash.lower())
+
+        return Response({"id": job.id}, status=202)
+
+
 class AppStatusView(APIView):
     """app status, public endpoint"""
 
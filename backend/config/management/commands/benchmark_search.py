@@ -0,0 +1,229 @@
+"""benchmark automated search pipeline"""
+
+import json
+import random
+import statistics
+import tracemalloc
+from datetime import date, timedelta
+from pathlib import Path
+from time import perf_counter
+
+import requests
+from autot.models import SearchWord, SearchWordCategory, TargetBitrate, invalidate_keywords
+from autot.src.release_name import parse_release
+from autot.src.search import SearchIndex
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from movie.models import Movie
+from tv.models import TVEpisode, TVSeason, TVShow
+
+
+class ReplayClient:
+    """serve recorded prowlarr response in place of the api"""
+
+    POOL_SIZE: int = 1
+
+    def __init__(self, payload: list[dict]):
+        self.content = json.dumps(payload).encode()
+
+    def get(self, url: str, **kwargs) -> requests.Response:
+        """build response from payload"""
+        response = requests.Response()
+        response.status_code = 200
+        response.url = url
+        response._content = self.content  # pylint: disable=protected-access
+
+        return response
+
+
+class Command(BaseCommand):
+    """command"""
+
+    help = (
+        "Replay recorded or synthetic Prowlarr responses through the search pipeline. "
+        "Runs against the configured database and cache, db changes are rolled back and keyword cache is cleared."
+    )
+
+    SHOW_NAME = "Benchmark Show"
+    MOVIE_NAME = "Benchmark Movie"
+    MOVIE_YEAR = 2019
+    RESOLUTIONS = ["2160p", "1080p", "720p", "480p"]
+    GROUPS = ["GRP", "NTb", "FLUX", "CAKES", "EDITH"]
+
+    def add_arguments(self, parser):
+        """add arguments"""
+        parser.add_argument("--sizes", nargs="+", type=int, default=[100, 1000, 5000], help="results per response")
+        parser.add_argument("--repeat", type=int, default=5, help="timed runs per search")
+        parser.add_argument("--fixture", type=Path, help="recorded prowlarr search response json, replaces --sizes")
+        parser.add_argument("--cold", action="store_true", help="clear parse and keyword caches before every run")
+        parser.add_argument("--budget-ms", type=float, help="fail if any median search time exceeds budget")
+
+    def handle(self, *args, **options):
+        """handle entry"""
+        random.seed(42)
+        payloads = self._get_payloads(options)
+        rows = []
+
+        try:
+            with transaction.atomic():
+                items = self._create_items()
+                for name, to_search in items.items():
+                    for payload_name, payload in payloads.items():
+                        rows.append((name, payload_name, *self._measure(to_search, payload, options)))
+
+                transaction.set_rollback(True)
+        finally:
+            # rolled back pks get reused, drop keywords cached for benchmark items
+            invalidate_keywords()
+
+        self._print_rows(rows)
+
+        budget = options.get("budget_ms")
+        if budget:
+            over_budget = [i for i in rows if i[2] > budget]
+            if over_budget:
+                raise CommandError(f"{len(over_budget)} search(es) over budget of {budget}ms")
+
+    def _get_payloads(self, options) -> dict[str, list[dict]]:
+        """load fixture or build synthetic responses"""
+        fixture = options.get("fixture")
+        if fixture:
+            if not fixture.exists():
+                raise CommandError(f"fixture not found: {fixture}")
+
+            return {fixture.name: json.loads(fixture.read_text())}
+
+        return {str(size): self._build_payload(size) for size in options["sizes"]}
+
+    def _create_items(self) -> dict[str, TVEpisode | TVSeason | Movie]:
+        """synthetic items with default, show level and item level keywords"""
+        resolution, _ = SearchWordCategory.objects.get_or_create(name="benchmark resolution")
+        source, _ = SearchWordCategory.objects.get_or_create(name="benchmark source")
+        SearchWord.objects.create(word="1080p", category=resolution, direction="i", tv_default=True, movie_default=True)
+        SearchWord.objects.create(word="cam", category=source, direction="e", tv_default=True, movie_default=True)
+        show_source = SearchWord.objects.create(word="web", category=source, direction="i")
+        episode_resolution = SearchWord.objects.create(word="720p", category=resolution, direction="i")
+        bitrate = TargetBitrate.objects.create(bitrate=5000, plusminus=50)
+
+        show = TVShow.objects.create(tvmaze_id="benchmark", name=self.SHOW_NAME, target_bitrate=bitrate)
+        show.search_keywords.add(show_source)
+        season = TVSeason.objects.create(tvmaze_id="benchmark", number=1, show=show)
+        episode = TVEpisode.objects.create(
+            tvmaze_id="benchmark",
+            number=2,
+            title="Benchmark Episode",
+            season=season,
+            runtime=45,
+            release_date=timezone.now() - timedelta(days=1),
+        )
+        inherited = TVEpisode.objects.create(
+            tvmaze_id="benchmark-inherited",
+            number=3,
+            title="Benchmark Episode Inherited",
+            season=season,
+            runtime=45,
+            release_date=timezone.now() - timedelta(days=1),
+        )
+        episode.search_keywords.add(episode_resolution)
+
+        movie = Movie.objects.create(
+            the_moviedb_id="benchmark",
+            name=self.MOVIE_NAME,
+            release_date=date(self.MOVIE_YEAR, 1, 1),
+            runtime=120,
+            target_bitrate=bitrate,
+        )
+
+        return {
+            "episode": episode,
+            "episode inherited": inherited,
+            "season": season,
+            "movie": movie,
+        }
+
+    def _build_payload(self, size: int) -> list[dict]:
+        """synthetic search response, mix of matching, similar and unrelated releases"""
+        titles = [
+            f"{self.SHOW_NAME} S01E{{episode:02d}} {{resolution}} WEB h264-{{group}}",
+            f"{self.SHOW_NAME} S01 COMPLETE {{resolution}} WEB x265-{{group}}",
+            f"{self.MOVIE_NAME} {self.MOVIE_YEAR} {{resolution}} BluRay x264-{{group}}",
+            "Other Show S01E{episode:02d} {resolution} HDTV x264-{group}",
+            f"{self.SHOW_NAME} S01E{{episode:02d}} CAM-{{group}}",
+        ]
+        publish_base = timezone.now()
+        payload = []
+        for index in range(size):
+            title = random.choice(titles).format(
+                episode=random.randint(1, 10),
+                resolution=random.choice(self.RESOLUTIONS),
+                group=random.choice(self.GROUPS),
+            )
+            payload.append(
+                {
+                    "guid": f"https://indexer.example/details/{index}",
+                    "title": title,
+                    "size": random.randint(200, 8000) * 1024 * 1024,
+                    "seeders": random.randint(0, 500),
+                    "leechers": random.randint(0, 100),
+                    "indexerId": random.randint(1, 5),
+                    "indexer": "benchmark",
+                    "publishDate": (publish_base - timedelta(hours=random.randint(1, 2000))).isoformat(),
+                    "downloadUrl": f"https://prowlarr.example/1/download?link={index}",
+                }
+            )
+
+        return payload
+
+    def _measure(self, to_search, payload: list[dict], options) -> tuple[float, float, int, int, int, int]:
+        """median and min wall time, db queries, allocated blocks, peak memory and valid results"""
+        search_index = SearchIndex()
+        search_index.client = ReplayClient(payload)
+        search_index.indexer_selection = {i: None for i in search_index.CATEGORY_MAP.values()}
+        search_index.indexer_scores = {i: {} for i in search_index.CATEGORY_MAP.values()}
+
+        timings = []
+        for _ in range(options["repeat"]):
+            self._reset_caches(options["cold"])
+            start = perf_counter()
+            self._run_search(search_index, to_search)
+            timings.append((perf_counter() - start) * 1000)
+
+        self._reset_caches(options["cold"])
+        with CaptureQueriesContext(connection) as queries:
+            tracemalloc.start()
+            before = tracemalloc.take_snapshot()
+            valid_results = self._run_search(search_index, to_search)
+            after = tracemalloc.take_snapshot()
+            _, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+
+        allocated = sum(i.count_diff for i in after.compare_to(before, "filename") if i.count_diff > 0)
+
+        return statistics.median(timings), min(timings), len(queries), allocated, peak // 1024, len(valid_results)
+
+    def _run_search(self, search_index: SearchIndex, to_search) -> list[dict]:
+        """build query, parse response, filter and rank"""
+        url = search_index.build_url(to_search)
+        results = search_index.make_request(url, use_cache=False)
+
+        return search_index.validate_links(results, to_search) or []
+
+    def _reset_caches(self, cold: bool) -> None:
+        """clear in process and keyword caches for cold runs"""
+        if not cold:
+            return
+
+        parse_release.cache_clear()
+        invalidate_keywords()
+
+    def _print_rows(self, rows: list[tuple]) -> None:
+        """print result table"""
+        header = f"{'item':<20}{'results':>9}{'median ms':>12}{'min ms':>10}{'queries':>9}{'allocs':>10}"
+        header += f"{'peak KiB':>10}{'valid':>7}"
+        self.stdout.write(header)
+        for name, payload_name, median, minimum, queries, allocated, peak, valid in rows:
+            line = f"{name:<20}{payload_name:>9}{median:>12.2f}{minimum:>10.2f}{queries:>9}{allocated:>10}"
+            line += f"{peak:>10}{valid:>7}"
+            self.stdout.write(line)
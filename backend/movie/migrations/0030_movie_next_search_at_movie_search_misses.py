@@ -0,0 +1,23 @@
+# Generated by Django 6.0.5 on 2026-10-18 09:12
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("movie", "0029_movie_search_name"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="movie",
+            name="next_search_at",
+            field=models.DateTimeField(blank=True, null=True, verbose_name="Next search"),
+        ),
+        migrations.AddField(
+            model_name="movie",
+            name="search_misses",
+            field=models.PositiveIntegerField(default=0, verbose_name="Search misses"),
+        ),
+    ]
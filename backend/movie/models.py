@@ -5,13 +5,25 @@ from string import ascii_lowercase, digits
 from typing import Self
 
 from artwork.models import Artwork
-from autot.models import AppConfig, SearchWord, SearchWordCategory, TargetBitrate, Torrent, log_change
+from autot.models import (
+    AppConfig,
+    SearchBackoff,
+    SearchWord,
+    SearchWordCategory,
+    TargetBitrate,
+    Torrent,
+    get_cached_keywords,
+    invalidate_keywords,
+    log_change,
+)
 from autot.src.config import ConfigType, get_config
 from autot.src.helper import calc_target_file_size, title_clean
+from autot.src.matcher import BatchMatcher, MatchTarget
 from autot.static import MovieProductionState, MovieReleaseType, MovieStatus
 from django.db import models
+from django.db.models.signals import m2m_changed, post_save
+from django.dispatch import receiver
 from people.models import Credit
-from rapidfuzz import fuzz
 
 
 class BaseModel(models.Model):
@@ -74,12 +86,11 @@ class Collection(BaseModel):
             self.image_collection.update(image_url)
 
 
-class Movie(BaseModel):
+class Movie(BaseModel, SearchBackoff):
     """describes a movie"""
 
     TRACK_CHANGES = True
     CONFIG: ConfigType = get_config()
-    FUZZY_RATIO = 95
 
     the_moviedb_id = models.CharField(max_length=255, unique=True)
     imdb_id = models.CharField(255, unique=True, null=True, blank=True)
@@ -195,6 +206,7 @@ class Movie(BaseModel):
         self.status = "d"
         self.media_server_id = None
         self.media_server_meta = None
+        self.reset_search_backoff()
         self.save()
         log_change(self, action="c", field_name="torrent", new_value=torrent.magnet_hash)
 
@@ -235,16 +247,21 @@ class Movie(BaseModel):
 
     def is_valid_path(self, path: str, strict: bool = True) -> bool:
         """check if path is valid"""
-        movie_search = title_clean(self.search_query)
-        year_str = str(self.release_date.year)  # pylint: disable=no-member
-        path_lower = title_clean(path.lower())
-        close_enough = fuzz.partial_ratio(movie_search, path_lower) > self.FUZZY_RATIO
-        if close_enough and year_str in path_lower:
-            return True
-
-        return False
+        return bool(BatchMatcher([self]).match([path], strict=strict)[0, 0])
+
+    def get_match_target(self) -> MatchTarget:
+        """valid movie path has release year, always fuzzy match search query"""
+        return MatchTarget(
+            query=title_clean(self.search_query),
+            always_fuzzy=True,
+            year=self.release_date.year,  # pylint: disable=no-member
+        )
 
     def get_keywords(self: Self):
+        """get resolved keywords, cached until keywords change"""
+        return get_cached_keywords(self, self._resolve_keywords)
+
+    def _resolve_keywords(self: Self):
         """build keywords for movie"""
         keywords = SearchWord.objects.none()
         for category in SearchWordCategory.objects.all():
@@ -268,6 +285,27 @@ class Movie(BaseModel):
         return None
 
 
+@receiver(m2m_changed, sender=Movie.search_keywords.through)
+def keywords_changed(sender, instance, action, **kwargs):  # pylint: disable=unused-argument
+    """invalidate cached keywords, search again with changed keywords"""
+    if action not in ["post_add", "post_remove", "post_clear"]:
+        return
+
+    invalidate_keywords()
+
+    movies = Movie.objects.all()
+    if isinstance(instance, Movie):
+        movies = movies.filter(id=instance.id)
+
+    Movie.reset_search_backoff_bulk(movies)
+
+
+@receiver(post_save, sender=SearchWord)
+def default_keywords_changed(sender, instance, **kwargs):  # pylint: disable=unused-argument
+    """search again with changed keywords"""
+    Movie.reset_search_backoff_bulk(Movie.objects.all())
+
+
 class MovieRelease(models.Model):
     """track release of movie"""
 
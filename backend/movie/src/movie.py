@@ -66,6 +66,8 @@ class MovieDBMovie:
                 setattr(movie, key, value)
                 log_change(movie, "u", field_name=key, old_value=old_value, new_value=value)
                 fields_changed = True
+                if key == "release_date":
+                    movie.reset_search_backoff()
 
         if fields_changed:
             movie.save()
@@ -125,6 +127,7 @@ class MovieDBMovie:
                 )
             except MovieRelease.DoesNotExist:
                 movie_release = MovieRelease.objects.create(**release_data)
+                Movie.reset_search_backoff_bulk(Movie.objects.filter(id=movie.id))
                 continue
 
             fields_changed = False
@@ -137,6 +140,7 @@ class MovieDBMovie:
 
             if fields_changed:
                 movie_release.save()
+                Movie.reset_search_backoff_bulk(Movie.objects.filter(id=movie.id))
 
     def _get_remote_releases(self) -> dict:
         """get remote releases"""
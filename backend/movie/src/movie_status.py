@@ -74,18 +74,29 @@ class MovieStatus:
     def find_movie_magnets(self) -> bool:
         """find magnets for searching movies"""
         found_magnets = False
-        to_search = Movie.objects.filter(status="s")
+        to_search = Movie.objects.filter(Movie.search_due(), status="s")
         if not to_search:
             return found_magnets
 
-        logger.info("Searching for %s magnet(s)", to_search.count())
+        to_search = list(to_search)
+        logger.info("Searching for %s magnet(s)", len(to_search))
 
-        for movie in to_search:
-            magnet, title = SearchIndex().get_magnet(movie)
+        search_index = SearchIndex()
+        magnets = search_index.get_magnets(to_search)
+        missed = []
+        for movie, (magnet, title) in zip(to_search, magnets):
             if not magnet:
+                if not search_index.is_missed(movie):
+                    # failed request, keep schedule
+                    continue
+
+                movie.set_search_missed()
+                missed.append(movie)
                 continue
 
             movie.add_magnet(magnet, title)
             found_magnets = True
 
+        Movie.objects.bulk_update(missed, ["search_misses", "next_search_at"])
+
         return found_magnets
@@ -0,0 +1,33 @@
+# Generated by Django 6.0.5 on 2026-10-18 09:12
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("tv", "0015_tvepisode_number_offset_overwrite"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="tvepisode",
+            name="next_search_at",
+            field=models.DateTimeField(blank=True, null=True, verbose_name="Next search"),
+        ),
+        migrations.AddField(
+            model_name="tvepisode",
+            name="search_misses",
+            field=models.PositiveIntegerField(default=0, verbose_name="Search misses"),
+        ),
+        migrations.AddField(
+            model_name="tvseason",
+            name="next_search_at",
+            field=models.DateTimeField(blank=True, null=True, verbose_name="Next search"),
+        ),
+        migrations.AddField(
+            model_name="tvseason",
+            name="search_misses",
+            field=models.PositiveIntegerField(default=0, verbose_name="Search misses"),
+        ),
+    ]
@@ -1,27 +1,35 @@
 """all tv models"""
 
-import re
 from pathlib import Path
 from typing import Self
 
 import pytz
 from artwork.models import Artwork
-from autot.models import SearchWord, SearchWordCategory, TargetBitrate, Torrent, log_change
+from autot.models import (
+    SearchBackoff,
+    SearchWord,
+    SearchWordCategory,
+    TargetBitrate,
+    Torrent,
+    get_cached_keywords,
+    invalidate_keywords,
+    log_change,
+)
 from autot.src.config import ConfigType, get_config
-from autot.src.helper import calc_target_file_size, sanitize_file_name, title_clean
+from autot.src.helper import calc_target_file_size, normalize_name, sanitize_file_name, title_clean
+from autot.src.matcher import BatchMatcher, MatchTarget
 from autot.static import TvEpisodeStatus, TvShowStatus
 from django.db import models
-from django.db.models.signals import post_delete
+from django.db.models import QuerySet
+from django.db.models.signals import m2m_changed, post_delete, post_save
 from django.dispatch import receiver
 from people.models import Credit
-from rapidfuzz import fuzz
 
 
 class BaseModel(models.Model):
     """base model to enherit from"""
 
     CONFIG: ConfigType = get_config()
-    FUZZY_RATIO = 95
 
     tvmaze_id = models.CharField(max_length=255, verbose_name="ID on remote server")
     remote_server_url = models.URLField(null=True, blank=True, verbose_name="URL on remote server")
@@ -48,6 +56,14 @@ class BaseModel(models.Model):
         """remove keyword if existing"""
         instance.search_keywords.remove(to_remove)
 
+    def get_keywords(self):
+        """get resolved keywords, cached until keywords change"""
+        return get_cached_keywords(self, self._resolve_keywords)
+
+    def _resolve_keywords(self):
+        """implement in child class"""
+        raise NotImplementedError
+
     @property
     def target_file_size(self) -> tuple[float | None, float | None]:
         """implement in child class"""
@@ -198,7 +214,7 @@ class TVShow(BaseModel):
             self.save()
             log_change(self, "u", "season_fallback", new_value=image_url, comment="Updated image.")
 
-    def get_keywords(self: Self):
+    def _resolve_keywords(self: Self):
         """build keywords of show"""
         # pylint: disable=E1101
         keywords = SearchWord.objects.none()
@@ -228,7 +244,7 @@ class TVShow(BaseModel):
         if not self.status == "e":
             raise ValueError("can't add show torrent for show not ended")
 
-        episodes = TVEpisode.objects.filter(season__show=self)
+        episodes = TVEpisode.get_pack_episodes(TVEpisode.objects.filter(season__show=self))
 
         for episode in episodes:
             episode.add_magnet(magnet, title, torrent_type="w")
@@ -249,7 +265,7 @@ class TVShow(BaseModel):
         return None
 
 
-class TVSeason(BaseModel):
+class TVSeason(BaseModel, SearchBackoff):
     """describes a Season of a Show"""
 
     TRACK_CHANGES = True
@@ -289,7 +305,7 @@ class TVSeason(BaseModel):
         """get archive path of season"""
         return self.show.get_archive_path() / f"Season {self.number}"
 
-    def get_keywords(self: Self):
+    def _resolve_keywords(self: Self):
         """build keywords of show"""
         # pylint: disable=E1101
         keywords = SearchWord.objects.none()
@@ -330,26 +346,28 @@ class TVSeason(BaseModel):
         return lower, upper
 
     def add_magnet(self, magnet: str, title: str | None) -> None:
-        """add magnet to all episodes in season"""
-        episodes = TVEpisode.objects.filter(season=self)
+        """add magnet to all episodes in season still needing download"""
+        episodes = TVEpisode.get_pack_episodes(TVEpisode.objects.filter(season=self))
 
         for episode in episodes:
             episode.add_magnet(magnet, title, torrent_type="s")
 
         episodes.update(status="d", media_server_id=None, media_server_meta=None)
+        self.reset_search_backoff()
+        self.save()
         log_change(self, "c", comment="Added season Torrent.")
 
     def is_valid_path(self, path, strict: bool = False) -> bool:
         """check for valid season path"""
-        path_clean = title_clean(path)
-        has_complete = "complete" in path_clean
-
-        if strict:
-            close_enough = fuzz.partial_ratio(self.search_query.lower(), path_clean) > self.FUZZY_RATIO
-            if not close_enough:
-                return False
-
-        return has_complete
+        return bool(BatchMatcher([self]).match([path], strict=strict)[0, 0])
+
+    def get_match_target(self) -> MatchTarget:
+        """valid season path has complete, fuzzy match season query if strict"""
+        return MatchTarget(
+            query=self.search_query.lower(),
+            always_fuzzy=False,
+            complete=True,
+        )
 
     def get_target_bitrate(self) -> TargetBitrate | None:
         """get season target bitrate"""
@@ -367,7 +385,7 @@ class TVSeason(BaseModel):
         return None
 
 
-class TVEpisode(BaseModel):
+class TVEpisode(BaseModel, SearchBackoff):
     """describes an Episode of a Season of a Show"""
 
     TRACK_CHANGES = True
@@ -410,7 +428,7 @@ class TVEpisode(BaseModel):
             self.image_episode.update(image_url)
             log_change(self, "u", "image_episode", new_value=image_url, comment="Updated image.")
 
-    def get_keywords(self: Self):
+    def _resolve_keywords(self: Self):
         """build keywords of show"""
         # pylint: disable=E1101
         keywords = SearchWord.objects.none()
@@ -487,36 +505,25 @@ class TVEpisode(BaseModel):
 
     def is_valid_path(self, path: str, strict: bool = False) -> bool:
         """check if path is valid, apply offset"""
-        season_number = self.season.number
+        return bool(BatchMatcher([self]).match([path], strict=strict)[0, 0])
+
+    def get_match_target(self) -> MatchTarget:
+        """valid episode path has date or identifier, fuzzy match search query if strict"""
         if self.number_offset_overwrite:
             episode_number = self.number_offset_overwrite + self.number
         else:
             episode_number = self.number
 
-        path_clean = title_clean(path)
-
-        if strict:
-            if self.season.show.is_daily:
-                to_search = title_clean(self.search_query)
-            else:
-                to_search = self.search_query.lower()
-
-            close_enough = fuzz.partial_ratio(to_search, path_clean) > self.FUZZY_RATIO
-            if not close_enough:
-                return False
-
-        if title_clean(self.identifier_date) in path_clean:
-            return True
-
-        pattern_s = re.compile(rf"s0?{season_number}e0?{episode_number}", re.IGNORECASE)
-        if pattern_s.search(path_clean):
-            return True
+        if self.season.show.is_daily:
+            query = title_clean(self.search_query)
+        else:
+            query = self.search_query.lower()
 
-        pattern_x = re.compile(rf"0?{season_number}x0?{episode_number}", re.IGNORECASE)
-        if pattern_x.search(path_clean):
-            return True
+        target = MatchTarget(query=query, always_fuzzy=False, season=self.season.number, episode=episode_number)
+        if self.release_date:
+            target["date"] = normalize_name(self.identifier_date)
 
-        return False
+        return target
 
     def reset_download(self, reason: str | None) -> None:
         """reset torrent and state"""
@@ -529,6 +536,15 @@ class TVEpisode(BaseModel):
         self.save()
         log_change(self, "u", comment="Cancel Torrent Download")
 
+    @staticmethod
+    def get_pack_episodes(episodes: QuerySet) -> QuerySet:
+        """episodes to take from a pack, skip finished and ignored unless the pack replaces all"""
+        wanted = episodes.exclude(status__in=["f", "a", "i"])
+        if wanted.exists():
+            return wanted
+
+        return episodes
+
     def add_magnet(self, magnet, title, torrent_type="e") -> None:
         """add magnet to episode"""
         from autot.src.download import Transmission
@@ -545,6 +561,7 @@ class TVEpisode(BaseModel):
         self.status = "d"
         self.media_server_id = None
         self.media_server_meta = None
+        self.reset_search_backoff()
         self.save()
         log_change(self, action="c", field_name="torrent", new_value=torrent.magnet_hash)
 
@@ -604,3 +621,36 @@ def delete_torrent(sender, instance, **kwargs):  # pylint: disable=unused-argume
     for torrent in instance.torrent.all():
         if TVEpisode.objects.filter(torrent=torrent).count() == 1:
             torrent.delete()
+
+
+@receiver(m2m_changed, sender=TVShow.search_keywords.through)
+@receiver(m2m_changed, sender=TVSeason.search_keywords.through)
+@receiver(m2m_changed, sender=TVEpisode.search_keywords.through)
+def keywords_changed(sender, instance, action, **kwargs):  # pylint: disable=unused-argument
+    """invalidate cached keywords, search again with changed keywords"""
+    if action not in ["post_add", "post_remove", "post_clear"]:
+        return
+
+    invalidate_keywords()
+
+    seasons = TVSeason.objects.all()
+    episodes = TVEpisode.objects.all()
+    if isinstance(instance, TVShow):
+        seasons = seasons.filter(show=instance)
+        episodes = episodes.filter(season__show=instance)
+    elif isinstance(instance, TVSeason):
+        seasons = seasons.filter(id=instance.id)
+        episodes = episodes.filter(season=instance)
+    elif isinstance(instance, TVEpisode):
+        seasons = seasons.none()
+        episodes = episodes.filter(id=instance.id)
+
+    TVSeason.reset_search_backoff_bulk(seasons)
+    TVEpisode.reset_search_backoff_bulk(episodes)
+
+
+@receiver(post_save, sender=SearchWord)
+def default_keywords_changed(sender, instance, **kwargs):  # pylint: disable=unused-argument
+    """search again with changed keywords"""
+    TVSeason.reset_search_backoff_bulk(TVSeason.objects.all())
+    TVEpisode.reset_search_backoff_bulk(TVEpisode.objects.all())
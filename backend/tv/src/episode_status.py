@@ -56,39 +56,63 @@ class EpisodeStatus:
         finished_seasons = TVSeason.objects.filter(end_date__lt=timezone.now())
         searching_seasons = finished_seasons.annotate(
             total_episodes=Count("tvepisode"), searching_episodes=Count("tvepisode", filter=Q(tvepisode__status="s"))
-        ).filter(total_episodes=F("searching_episodes"))
+        ).filter(TVSeason.search_due(), total_episodes=F("searching_episodes"))
 
         if not searching_seasons:
             return found_magnets
 
-        for season in searching_seasons:
-            magnet, title = SearchIndex().get_magnet(season)
+        searching_seasons = list(searching_seasons)
+        search_index = SearchIndex()
+        magnets = search_index.get_magnets(searching_seasons)
+        missed = []
+        for season, (magnet, title) in zip(searching_seasons, magnets):
             if not magnet:
+                if not search_index.is_missed(season):
+                    # failed request, keep schedule
+                    continue
+
+                season.set_search_missed()
+                missed.append(season)
                 continue
 
             season_episodes = TVEpisode.objects.filter(season=season)
             for episode in season_episodes:
                 episode.add_magnet(magnet, title, torrent_type="s")
 
+            season.reset_search_backoff()
+            season.save()
             found_magnets = True
             log_change(season, "c", comment="Added magnet for season episodes")
 
+        TVSeason.objects.bulk_update(missed, ["search_misses", "next_search_at"])
+
         return found_magnets
 
     def find_episode_magnets(self) -> bool:
         """find magnet links for searching episodes"""
         found_magnets = False
-        to_search = TVEpisode.objects.filter(status="s")
+        to_search = TVEpisode.objects.filter(TVEpisode.search_due(), status="s")
         if not to_search:
             return found_magnets
 
-        logger.info("Searching for %s magnet(s)", to_search.count())
-        for episode in to_search:
-            magnet, title = SearchIndex().get_magnet(episode)
+        to_search = list(to_search)
+        logger.info("Searching for %s magnet(s)", len(to_search))
+        search_index = SearchIndex()
+        magnets = search_index.get_episode_magnets(to_search)
+        missed = []
+        for episode, (magnet, title) in zip(to_search, magnets):
             if not magnet:
+                if not search_index.is_missed(episode):
+                    # failed request, keep schedule
+                    continue
+
+                episode.set_search_missed()
+                missed.append(episode)
                 continue
 
             episode.add_magnet(magnet, title)
             found_magnets = True
 
+        TVEpisode.objects.bulk_update(missed, ["search_misses", "next_search_at"])
+
         return found_magnets
@@ -165,6 +165,7 @@ class TVMazeShow:
                     log_change(season, "u", field_name=key, old_value=old_value, new_value=value)
                     setattr(season, key, value)
                     fields_changed = True
+                    self._check_search_backoff(season, key)
 
             if fields_changed:
                 season.save()
@@ -232,6 +233,7 @@ class TVMazeShow:
                     log_change(episode, "u", field_name=key, old_value=old_value, new_value=value)
                     setattr(episode, key, value)
                     fields_changed = True
+                    self._check_search_backoff(episode, key)
                     if episode.media_server_id:
                         to_refresh.add(episode.media_server_id)
 
@@ -268,6 +270,12 @@ class TVMazeShow:
 
         return episode_data
 
+    @staticmethod
+    def _check_search_backoff(instance: TVSeason | TVEpisode, key: str) -> None:
+        """search again on changed release"""
+        if key in ["release_date", "end_date"]:
+            instance.reset_search_backoff()
+
     def _set_episode_status(self, episode: TVEpisode) -> None:
         """set status for new episodes"""
         cutoff = timezone.now() - timedelta(days=365)
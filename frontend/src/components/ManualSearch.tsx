@@ -94,7 +94,7 @@ const ManualSearch: React.FC<ManualSearchInterface> = ({
   searchDefault = '',
   setRefresh,
 }) => {
-  const { post } = useApi()
+  const { postStream } = useApi()
   const [searchTerm, setSearchTerm] = useState('')
   const [isSearching, setIsSearching] = useState(false)
   const [searchResults, setSearchResults] = useState<ManualSearchType[] | null>(
@@ -104,14 +104,26 @@ const ManualSearch: React.FC<ManualSearchInterface> = ({
   const handleSearch = async () => {
     setIsSearching(true)
     setSearchResults(null)
-    const data = await post('torrent/search/', {
-      search_term: searchTerm,
-      category: searchType,
-    })
-    if (data) {
-      setSearchResults(data)
-    } else {
-      setSearchResults(null)
+    try {
+      await postStream(
+        'torrent/search-stream/',
+        {
+          search_term: searchTerm,
+          category: searchType,
+        },
+        (line) => {
+          // merge results of each indexer as it answers
+          const indexerResults = line as ManualSearchType[]
+          setSearchResults((prev) =>
+            [...(prev || []), ...indexerResults].sort(
+              (a, b) => b.gain - a.gain,
+            ),
+          )
+        },
+      )
+      setSearchResults((prev) => prev || [])
+    } catch (error) {
+      console.error('search failed', error)
     }
     setIsSearching(false)
   }
@@ -150,12 +162,15 @@ const ManualSearch: React.FC<ManualSearchInterface> = ({
           />
         )}
       </div>
-      {isSearching ? (
+      {isSearching && searchResults === null ? (
         <Spinner />
       ) : searchResults !== null ? (
         searchResults.length > 0 ? (
           <>
-            <P className="mb-2">{searchResults.length} results found</P>
+            <P className="mb-2">
+              {searchResults.length} results found
+              {isSearching && ', still searching...'}
+            </P>
             <div className="max-h-[50vh] overflow-scroll">
               {searchResults.map((result) => (
                 <ManualSearchResult
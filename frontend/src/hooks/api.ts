@@ -165,6 +165,53 @@ const useApi = () => {
     return await fetchData(url, 'POST', body)
   }
 
+  const postStream = async (
+    url: string,
+    body: object | null,
+    onLine: (line: unknown) => void,
+  ) => {
+    // read newline delimited json, call onLine for every complete line
+    setError(null)
+    try {
+      const response = await fetch(`${API_BASE}${url}`, {
+        method: 'POST',
+        headers: {
+          'Content-Type': 'application/json',
+          ...(csrfToken ? { 'X-CSRFToken': csrfToken } : {}),
+        },
+        body: body ? JSON.stringify(body) : null,
+        credentials: 'include',
+      })
+
+      if (!response.ok || !response.body) {
+        if (response.status === 403) setIsLoggedIn(false)
+        throw new Error(`HTTP error! status ${response.status}`)
+      }
+
+      const reader = response.body.getReader()
+      const decoder = new TextDecoder()
+      let buffer = ''
+      while (true) {
+        const { done, value } = await reader.read()
+        if (done) break
+        buffer += decoder.decode(value, { stream: true })
+        const lines = buffer.split('\n')
+        buffer = lines.pop() || ''
+        lines
+          .filter((line) => line.trim())
+          .forEach((line) => onLine(JSON.parse(line)))
+      }
+      if (buffer.trim()) onLine(JSON.parse(buffer))
+    } catch (error) {
+      if (error instanceof Error) {
+        setError(error.message)
+      } else {
+        setError('data streaming failed')
+      }
+      throw error
+    }
+  }
+
   const put = async (url: string, body: object | null) => {
     return await fetchData(url, 'PUT', body)
   }
@@ -181,6 +228,7 @@ const useApi = () => {
     error,
     get,
     post,
+    postStream,
     patch,
     put,
     del,